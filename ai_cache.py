@@ -0,0 +1,153 @@
+"""
+Two-tier cache for AI responses: an in-memory LRU in front of a directory of
+small JSON files, one per entry, named by the SHA-256 of the request key.
+The disk tier is shared by every process using the same DATA_DIR.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+import storage
+
+def normalize_text(text):
+    """NFC-normalize and collapse whitespace, so trivially different inputs share an entry."""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+def cache_key(*parts):
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Entries expire `ttl` seconds after they were stored. The memory tier keeps
+    the `max_memory_entries` most recently used entries; the disk tier is
+    pruned (expired first, then oldest) whenever it may have grown past
+    `max_disk_entries`.
+    """
+
+    PRUNE_EVERY = 256
+
+    def __init__(self, directory, ttl, max_memory_entries=1024, max_disk_entries=20000):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0,
+                       "stores": 0, "memory_evictions": 0, "disk_evictions": 0}
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+                self._stats["memory_evictions"] += 1
+
+    def _expired(self, entry, now):
+        return now - entry["created_at"] > self.ttl
+
+    def get_entry(self, key, record_stats=True):
+        """{"value", "created_at"} for a live entry, or None. Background lookups pass record_stats=False."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry, now):
+                    self._memory.move_to_end(key)
+                    if record_stats:
+                        self._stats["memory_hits"] += 1
+                    return entry
+                del self._memory[key]
+
+        entry = storage.read_json(self._path(key), {})
+        if entry and not self._expired(entry, now):
+            self._remember(key, entry)
+            if record_stats:
+                self._count("disk_hits")
+            return entry
+
+        if entry:
+            self._count("expired")
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+        if record_stats:
+            self._count("misses")
+        return None
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return None if entry is None else entry["value"]
+
+    def put(self, key, value):
+        entry = {"value": value, "created_at": time.time()}
+        self._remember(key, entry)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        storage.write_json(path, entry)
+
+        with self._lock:
+            self._stats["stores"] += 1
+            self._writes_since_prune += 1
+            prune = self._writes_since_prune >= self.PRUNE_EVERY
+            if prune:
+                self._writes_since_prune = 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Drop expired disk entries, then the oldest ones beyond max_disk_entries."""
+        now = time.time()
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        files.append((os.path.getmtime(path), path))
+                    except OSError:
+                        pass
+
+        files.sort()
+        excess = len(files) - self.max_disk_entries
+        removed = 0
+        for i, (mtime, path) in enumerate(files):
+            if i >= excess and now - mtime <= self.ttl:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        self._count("disk_evictions", removed)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(root, name))
+                    except OSError:
+                        pass
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, memory_entries=len(self._memory))
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -1,16 +1,184 @@
+import asyncio
+import functools
+import io
 import json
 import os
+import queue
+import shutil
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import httpx
 from google import genai
 from google.genai import types
+import ai_cache
+import conversation
+import prompt_templates
+import rate_limiter
+import resilience
+import single_flight
 
 # IMPORTANT: KEEP THIS COMMENT
 # Using Google Gemini API via blueprint:python_gemini
 # Models: gemini-2.5-flash (fast, cheap) and gemini-2.5-pro (complex reasoning)
 
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+# Optional endpoint override, e.g. a local stub server when measuring latency
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL")
+# Retries use decorrelated-jitter backoff within a process-wide retry budget;
+# each model has a circuit breaker that fails fast during provider outages.
 MAX_RETRIES = 3
-RETRY_DELAY = 2
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30.0
+retry_policy = resilience.RetryPolicy(
+    max_attempts=MAX_RETRIES,
+    base_delay=RETRY_BASE_DELAY,
+    max_delay=RETRY_MAX_DELAY,
+    failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=CIRCUIT_RESET_SECONDS
+)
+
+# One client (and one pooled HTTP connection set) is shared by every session in the process
+HTTP_MAX_CONNECTIONS = 20
+HTTP_KEEPALIVE_SECONDS = 120
+
+DATA_DIR = os.environ.get("HEALTH_DATA_DIR", "/tmp/health_data")
+AI_CACHE_DIR = os.path.join(DATA_DIR, "ai_cache")
+
+# Client-side quota per model, so concurrent sessions queue here instead of
+# drawing 429s. GEMINI_RATE_LIMITS (JSON, same shape) overrides the defaults;
+# RATE_LIMIT_SHARED=1 shares the buckets between processes via DATA_DIR.
+DEFAULT_RATE_LIMITS = {
+    "gemini-2.5-flash": {"rpm": 60, "tpm": 1000000},
+    "gemini-2.5-pro": {"rpm": 30, "tpm": 500000}
+}
+RATE_LIMITS = json.loads(os.environ.get("GEMINI_RATE_LIMITS") or "null") or DEFAULT_RATE_LIMITS
+RATE_LIMIT_SHARED = os.environ.get("RATE_LIMIT_SHARED") == "1"
+RATE_LIMIT_MAX_WAIT = 30
+# Symptom analysis goes first when quota is short; hospital lookups (and
+# background cache work, which runs in PRIORITY_BACKGROUND) go last.
+OPERATION_PRIORITIES = {
+    "analyze_symptoms": rate_limiter.PRIORITY_URGENT,
+    "find_nearby_hospitals": rate_limiter.PRIORITY_LOOKUP
+}
+rate_limit = rate_limiter.RateLimiter(
+    RATE_LIMITS,
+    store=rate_limiter.FileBucketStore(os.path.join(DATA_DIR, "rate_limits")) if RATE_LIMIT_SHARED else None,
+    max_wait=RATE_LIMIT_MAX_WAIT
+)
+
+# Static prompt templates are stored as provider context caches when they are
+# large enough to qualify (CONTEXT_CACHING=0 always sends them inline)
+CONTEXT_CACHING = os.environ.get("CONTEXT_CACHING", "1") == "1"
+CONTEXT_CACHE_TTL = 3600
+CONTEXT_CACHE_MIN_TOKENS = {
+    "gemini-2.5-flash": 1024,
+    "gemini-2.5-pro": 2048
+}
+
+# Recordings larger than this are uploaded through the Files API instead of
+# being sent inline with the request
+AUDIO_INLINE_MAX_BYTES = int(os.environ.get("AUDIO_INLINE_MAX_BYTES", str(4 * 1024 * 1024)))
+AUDIO_PROCESSING_TIMEOUT = 60
+
+# AI Chat sends a running summary plus the most recent turns within this
+# many tokens; the on-screen transcript keeps the last CHAT_MAX_MESSAGES
+CHAT_HISTORY_TOKENS = int(os.environ.get("CHAT_HISTORY_TOKENS", "2000"))
+CHAT_MAX_MESSAGES = 200
+
+# analyze_symptoms tries the fast model first and escalates to pro for severe,
+# urgent or malformed reports. SYMPTOM_ROUTING=0 always uses pro.
+SYMPTOM_ROUTING = os.environ.get("SYMPTOM_ROUTING", "1") == "1"
+SYMPTOM_FAST_MODEL = "gemini-2.5-flash"
+SYMPTOM_ESCALATION_MODEL = "gemini-2.5-pro"
+SEVERITY_LEVELS = ("Low", "Medium", "High", "Critical")
+ESCALATE_SEVERITIES = ("High", "Critical")
+# USD per million (input, output) tokens, for the routing cost counters
+MODEL_PRICES = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00)
+}
+_routing_stats = {}
+context_cache = prompt_templates.ContextCache(
+    lambda: get_gemini_client(),
+    ttl_seconds=CONTEXT_CACHE_TTL,
+    min_tokens=CONTEXT_CACHE_MIN_TOKENS,
+    enabled=CONTEXT_CACHING
+)
+
+# Identical concurrent translate_text / find_nearby_hospitals / analyze_symptoms
+# calls (keyed by request fingerprint) share one upstream request
+inflight = single_flight.SingleFlight()
+
+# Translations are content-addressed by (normalized text, source, target, model,
+# prompt version); bump the prompt version when a translation prompt changes.
+TRANSLATION_MODEL = "gemini-2.5-flash"
+TRANSLATION_PROMPT_VERSION = 1
+TRANSLATION_CACHE_TTL = int(os.environ.get("TRANSLATION_CACHE_TTL", str(30 * 24 * 3600)))
+translation_cache = ai_cache.ResponseCache(
+    os.path.join(AI_CACHE_DIR, "translations"),
+    ttl=TRANSLATION_CACHE_TTL,
+    max_memory_entries=2048,
+    max_disk_entries=50000
+)
+
+# Hospital lookups: fresh for HOSPITAL_CACHE_TTL, then served stale for up to
+# HOSPITAL_CACHE_STALE_SECONDS more while a background refresh runs.
+HOSPITAL_MODEL = "gemini-2.5-flash"
+HOSPITAL_PROMPT_VERSION = 1
+HOSPITAL_CACHE_TTL = int(os.environ.get("HOSPITAL_CACHE_TTL", str(7 * 24 * 3600)))
+HOSPITAL_CACHE_STALE_SECONDS = int(os.environ.get("HOSPITAL_CACHE_STALE_SECONDS", str(30 * 24 * 3600)))
+HOSPITAL_WARMUP_LANGUAGES = [lang for lang in os.environ.get("HOSPITAL_WARMUP_LANGUAGES", "English").split(",") if lang]
+HOSPITAL_WARMUP_WORKERS = 2
+hospital_cache = ai_cache.ResponseCache(
+    os.path.join(AI_CACHE_DIR, "hospitals"),
+    ttl=HOSPITAL_CACHE_TTL + HOSPITAL_CACHE_STALE_SECONDS,
+    max_memory_entries=512,
+    max_disk_entries=10000
+)
+
+INDIAN_CITIES = [
+    "Mumbai", "Delhi", "Bangalore", "Hyderabad", "Chennai",
+    "Kolkata", "Pune", "Ahmedabad", "Jaipur", "Lucknow",
+    "Chandigarh", "Bhopal", "Indore", "Nagpur", "Patna",
+    "Thiruvananthapuram", "Kochi", "Coimbatore", "Visakhapatnam",
+    "Guwahati", "Bhubaneswar", "Ranchi", "Dehradun", "Shimla"
+]
+
+HOSPITAL_SPECIALTIES = [
+    "All Specialties",
+    "General Medicine",
+    "Cardiology",
+    "Orthopedics",
+    "Pediatrics",
+    "Gynecology",
+    "Neurology",
+    "Oncology",
+    "Dermatology",
+    "ENT",
+    "Ophthalmology",
+    "Psychiatry",
+    "Emergency Care"
+]
+
+_hospital_refreshing = set()
+_hospital_refresh_lock = threading.Lock()
+_hospital_warmup_started = False
+
+# Async variants run the blocking calls on this pool; its size is the global
+# cap on concurrent model calls made through them, across every session.
+AI_MAX_CONCURRENCY = int(os.environ.get("AI_MAX_CONCURRENCY", "8"))
+_ai_pool = ThreadPoolExecutor(max_workers=AI_MAX_CONCURRENCY, thread_name_prefix="ai-call")
+
+_client = None
+_client_lock = threading.Lock()
+_latency_lock = threading.Lock()
+_latency_stats = {}
+_token_stats = {}
 
 SUPPORTED_LANGUAGES = {
     "English": "en",
@@ -30,33 +198,234 @@ def validate_api_key():
         return False, "Gemini API key not configured. Please set GEMINI_API_KEY environment variable."
     return True, ""
 
-def get_gemini_client():
+def create_gemini_client():
     is_valid, error_msg = validate_api_key()
     if not is_valid:
         raise ValueError(error_msg)
-    return genai.Client(api_key=GEMINI_API_KEY)
+    
+    http_options = types.HttpOptions(
+        base_url=GEMINI_BASE_URL,
+        client_args={
+            "limits": httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_SECONDS
+            )
+        }
+    )
+    return genai.Client(api_key=GEMINI_API_KEY, http_options=http_options)
+
+def get_gemini_client():
+    """Lazily create the process-wide client; later calls reuse its warm connections."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                with track_latency("client_setup"):
+                    _client = create_gemini_client()
+    return _client
+
+def set_gemini_client(client):
+    """Install a client (e.g. a fake that injects faults) in place of the shared one."""
+    global _client
+    with _client_lock:
+        _client = client
+
+def reset_gemini_client():
+    global _client
+    with _client_lock:
+        _client = None
+
+def record_latency(operation, seconds):
+    with _latency_lock:
+        stats = _latency_stats.setdefault(operation, {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        stats["calls"] += 1
+        stats["total_seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+@contextmanager
+def track_latency(operation):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_latency(operation, time.perf_counter() - start)
+
+def record_tokens(operation, usage):
+    """Input tokens per operation, and how many of them the provider served from a context cache."""
+    if usage is None:
+        return
+    with _latency_lock:
+        stats = _token_stats.setdefault(operation, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+        stats["calls"] += 1
+        stats["prompt_tokens"] += getattr(usage, "prompt_token_count", None) or 0
+        stats["cached_tokens"] += getattr(usage, "cached_content_token_count", None) or 0
+
+def get_latency_stats():
+    """Per-operation call count, total/average/max seconds since start (or the last reset)"""
+    with _latency_lock:
+        return {
+            operation: dict(stats, avg_seconds=stats["total_seconds"] / stats["calls"])
+            for operation, stats in _latency_stats.items()
+        }
+
+def reset_latency_stats():
+    with _latency_lock:
+        _latency_stats.clear()
+        _token_stats.clear()
+
+def generate_content(operation, **kwargs):
+    """
+    Single entry point for model calls: shared client, per-operation latency
+    tracking, and the shared retry policy (backoff, budget, circuit breaker).
+    """
+    client = get_gemini_client()
+    model = kwargs.get("model")
+    tokens = request_token_estimate(kwargs)
+    priority = rate_limiter.current_lane(OPERATION_PRIORITIES.get(operation, rate_limiter.PRIORITY_INTERACTIVE))
+    
+    def _call():
+        rate_limit.acquire(model, tokens, priority)
+        with track_latency(operation):
+            response = client.models.generate_content(**kwargs)
+        usage = getattr(response, "usage_metadata", None)
+        rate_limit.settle(model, tokens, getattr(usage, "total_token_count", None))
+        record_tokens(operation, usage)
+        return response
+    
+    return retry_policy.call(model, _call)
+
+def request_token_estimate(kwargs):
+    config = kwargs.get("config")
+    system_instruction = getattr(config, "system_instruction", None)
+    tokens = rate_limiter.estimate_tokens(kwargs.get("contents"), getattr(config, "max_output_tokens", None))
+    if isinstance(system_instruction, str):
+        tokens += len(system_instruction) // 4
+    return tokens
+
+def get_rate_limit_stats():
+    return rate_limit.stats()
+
+BUSY_MESSAGE = "The AI service is currently busy. Please try again in a moment."
+
+def is_busy_error(e):
+    return (isinstance(e, (resilience.CircuitOpenError, rate_limiter.RateLimitExceeded))
+            or resilience.is_transient_error(e))
+
+def error_message(e, prefix):
+    return BUSY_MESSAGE if is_busy_error(e) else f"{prefix}: {str(e)}"
 
 def call_gemini_with_retry(func):
-    for attempt in range(MAX_RETRIES):
+    """
+    Run func. Its model calls are already retried by generate_content; an
+    outage that outlasts the retries becomes a "service busy" response.
+    """
+    try:
+        return func()
+    except Exception as e:
+        if is_busy_error(e):
+            return {"success": False, "error": BUSY_MESSAGE}
+        raise e
+
+def get_resilience_stats():
+    return retry_policy.stats()
+
+def stream_content(operation, **kwargs):
+    """
+    Yield text chunks from generate_content_stream. Transient errors are
+    retried only until the first chunk arrives; after that the caller has
+    already shown partial text, so the error is raised instead.
+    """
+    client = get_gemini_client()
+    model = kwargs.get("model")
+    tokens = request_token_estimate(kwargs)
+    priority = rate_limiter.current_lane(OPERATION_PRIORITIES.get(operation, rate_limiter.PRIORITY_INTERACTIVE))
+    delay = retry_policy.base_delay
+    attempt = 0
+    while True:
+        retry_policy.before_attempt(model, attempt)
+        start = time.perf_counter()
+        first_chunk = True
+        usage = None
+        settled = False
         try:
-            return func()
-        except Exception as e:
-            error_msg = str(e)
-            if "503" in error_msg or "overloaded" in error_msg.lower() or "UNAVAILABLE" in error_msg:
-                if attempt < MAX_RETRIES - 1:
-                    time.sleep(RETRY_DELAY * (attempt + 1))
+            rate_limit.acquire(model, tokens, priority)
+            for chunk in client.models.generate_content_stream(**kwargs):
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                if not chunk.text:
                     continue
-                else:
-                    return {"success": False, "error": "The AI service is currently busy. Please try again in a moment."}
-            raise e
+                if first_chunk:
+                    record_latency(operation + ".first_chunk", time.perf_counter() - start)
+                    first_chunk = False
+                yield chunk.text
+            record_latency(operation, time.perf_counter() - start)
+            rate_limit.settle(model, tokens, getattr(usage, "total_token_count", None))
+            record_tokens(operation, usage)
+            settled = True
+            retry_policy.on_success(model)
+            return
+        except Exception as e:
+            settled = True
+            delay = retry_policy.on_failure(model, e, attempt, delay, retry=first_chunk)
+            if delay is None:
+                raise
+        finally:
+            # Closed part-way (GeneratorExit) or interrupted by a BaseException such as Streamlit's rerun
+            if not settled:
+                retry_policy.on_cancel(model)
+        retry_policy.sleep(delay)
+        attempt += 1
+
+class TextStream:
+    """
+    Iterable of text chunks for st.write_stream. Errors never escape the
+    iteration: afterwards `text` holds everything received and `error` is
+    None or a user-facing message (the stream may have stopped part-way).
+    """
+    
+    def __init__(self, chunks, error_prefix):
+        self._chunks = chunks
+        self._error_prefix = error_prefix
+        self.text = ""
+        self.error = None
+    
+    @property
+    def success(self):
+        return self.error is None
+    
+    def __iter__(self):
+        try:
+            for chunk in self._chunks:
+                self.text += chunk
+                yield chunk
+        except ValueError as e:
+            self.error = str(e)
+        except Exception as e:
+            self.error = error_message(e, self._error_prefix)
+
+def translation_cache_key(kind, text, source_language, target_language):
+    return ai_cache.cache_key(kind, ai_cache.normalize_text(text), source_language, target_language,
+                              TRANSLATION_MODEL, TRANSLATION_PROMPT_VERSION)
+
+def get_translation_cache_stats():
+    return translation_cache.stats()
 
 def translate_text(text, source_language, target_language):
+    cache_key = translation_cache_key("translate_text", text, source_language, target_language)
+    cached = translation_cache.get(cache_key)
+    if cached is not None:
+        return {"success": True, "translation": cached, "error": None}
+    
+    return inflight.do("translate_text", cache_key,
+                       lambda: request_translation(cache_key, text, source_language, target_language))
+
+def request_translation(cache_key, text, source_language, target_language):
     def _translate():
-        client = get_gemini_client()
         system_instruction = f"You are a professional medical translator. Translate the following text from {source_language} to {target_language}. Maintain medical terminology accuracy and cultural sensitivity. Only provide the translation, no explanations."
         
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
+        response = generate_content(
+            "translate_text",
+            model=TRANSLATION_MODEL,
             contents=text,
             config=types.GenerateContentConfig(
                 system_instruction=system_instruction,
@@ -69,68 +438,162 @@ def translate_text(text, source_language, target_language):
         result = call_gemini_with_retry(_translate)
         if isinstance(result, dict) and not result.get("success"):
             return result
+        if result.get("translation"):
+            translation_cache.put(cache_key, result["translation"])
         return result
     except ValueError as e:
         return {"success": False, "translation": None, "error": str(e)}
     except Exception as e:
-        return {"success": False, "translation": None, "error": f"Translation failed: {str(e)}"}
+        return {"success": False, "translation": None, "error": error_message(e, "Translation failed")}
+
+def get_coalescing_stats():
+    return inflight.stats()
 
 def analyze_symptoms(symptoms_text, language, health_context=None, user_role="Patient"):
+    # Requests carrying a personal health profile are never shared between users
+    if health_context:
+        return _analyze_symptoms(symptoms_text, language, health_context, user_role)
+    key = ai_cache.cache_key("analyze_symptoms", ai_cache.normalize_text(symptoms_text), language, user_role)
+    return inflight.do("analyze_symptoms", key,
+                       lambda: _analyze_symptoms(symptoms_text, language, None, user_role))
+
+def templated_request(model, template, context, contents, **config_kwargs):
+    """
+    (contents, config) for a prompt template plus per-request context. With a
+    provider cache the static template is referenced by name and the context
+    travels with the contents; otherwise both are sent as the system instruction.
+    """
+    cached_content = context_cache.get(model, template)
+    if cached_content:
+        if context:
+            if isinstance(contents, list) and contents and isinstance(contents[0], types.Content):
+                contents = [types.UserContent(parts=[types.Part.from_text(text=context)])] + contents
+            else:
+                contents = [context] + (contents if isinstance(contents, list) else [contents])
+        return contents, types.GenerateContentConfig(cached_content=cached_content, **config_kwargs)
+    
+    system_instruction = template.text + ("\n\n" + context if context else "")
+    return contents, types.GenerateContentConfig(system_instruction=system_instruction, **config_kwargs)
+
+def symptom_analysis_request(model, symptoms_text, language, health_context=None, user_role="Patient"):
+    return templated_request(
+        model,
+        prompt_templates.symptom_analysis_template(user_role, language),
+        prompt_templates.symptom_analysis_context(health_context),
+        symptoms_text,
+        response_mime_type="application/json",
+        max_output_tokens=2048
+    )
+
+def get_prompt_cache_stats():
+    stats = context_cache.stats()
+    with _latency_lock:
+        stats["tokens"] = {operation: dict(tokens) for operation, tokens in _token_stats.items()}
+    return stats
+
+def parse_symptom_analysis(text):
+    """The model's JSON report, or None if it is not valid JSON with the fields routing relies on."""
     try:
-        client = get_gemini_client()
+        result = json.loads(text or "")
+    except ValueError:
+        return None
+    if not isinstance(result, dict) or not isinstance(result.get("urgent_care_needed"), bool):
+        return None
+    if result.get("severity_level") not in SEVERITY_LEVELS:
+        return None
+    return result
+
+def escalation_reason(result):
+    if result is None:
+        return "invalid_json"
+    if result["severity_level"] in ESCALATE_SEVERITIES:
+        return "severity"
+    if result["urgent_care_needed"]:
+        return "urgent_care"
+    return None
+
+def model_cost(model, response):
+    """Estimated USD cost of one response from its usage metadata."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None or model not in MODEL_PRICES:
+        return 0.0
+    input_price, output_price = MODEL_PRICES[model]
+    output_tokens = (usage.candidates_token_count or 0) + (usage.thoughts_token_count or 0)
+    return ((usage.prompt_token_count or 0) * input_price + output_tokens * output_price) / 1_000_000
+
+def record_route(route, seconds, cost, reason=None):
+    with _latency_lock:
+        stats = _routing_stats.setdefault(route, {"calls": 0, "total_seconds": 0.0, "cost_usd": 0.0, "reasons": {}})
+        stats["calls"] += 1
+        stats["total_seconds"] += seconds
+        stats["cost_usd"] += cost
+        if reason:
+            stats["reasons"][reason] = stats["reasons"].get(reason, 0) + 1
+
+def get_routing_stats():
+    """Per analyze_symptoms route: calls, latency, estimated cost and escalation reasons."""
+    with _latency_lock:
+        return {
+            route: dict(stats, reasons=dict(stats["reasons"]), avg_seconds=stats["total_seconds"] / stats["calls"],
+                        avg_cost_usd=stats["cost_usd"] / stats["calls"])
+            for route, stats in _routing_stats.items()
+        }
+
+def _analyze_symptoms(symptoms_text, language, health_context, user_role):
+    """
+    Ask the fast model first; escalate to the pro model only when its report
+    is severe, says urgent care is needed, or is not valid JSON.
+    """
+    try:
+        start = time.perf_counter()
+        cost = 0.0
+        reason = "routing_disabled"
         
-        health_info = ""
-        if health_context:
-            health_info = f"\n\nIMPORTANT PATIENT INFORMATION:\n{health_context}\n\nConsider this health profile when analyzing symptoms. Pay special attention to:\n- Any allergies when suggesting treatments\n- Existing chronic conditions that might be related\n- Current medications that might interact or cause side effects\n- Lifestyle factors that could be relevant\n\n"
+        if SYMPTOM_ROUTING:
+            try:
+                contents, config = symptom_analysis_request(SYMPTOM_FAST_MODEL, symptoms_text, language,
+                                                            health_context, user_role)
+                response = generate_content(
+                    "analyze_symptoms",
+                    model=SYMPTOM_FAST_MODEL,
+                    contents=contents,
+                    config=config
+                )
+                cost += model_cost(SYMPTOM_FAST_MODEL, response)
+                result = parse_symptom_analysis(response.text)
+                reason = escalation_reason(result)
+            except Exception as e:
+                if not is_busy_error(e):
+                    raise
+                reason = "fast_model_unavailable"
+            
+            if reason is None:
+                record_route("flash", time.perf_counter() - start, cost)
+                result["success"] = True
+                result["error"] = None
+                return result
         
-        if user_role == "Patient":
-            system_instruction = (
-                f"You are an AI medical assistant analyzing patient symptoms. The patient is describing symptoms in {language}. "
-                f"{health_info}"
-                "Generate a structured medical report with the following sections in JSON format: "
-                "1) 'symptoms_summary': Brief, easy-to-understand summary (2-3 sentences max) "
-                "2) 'possible_conditions': List of 2-4 possible conditions using simple terms (not a diagnosis) "
-                "3) 'severity_level': Low, Medium, or High "
-                "4) 'recommendations': 3-5 simple, actionable health tips the patient can follow at home "
-                "5) 'urgent_care_needed': true or false "
-                "6) 'when_to_see_doctor': Clear guidance on when to seek medical help "
-                "7) 'allergy_warnings': Any warnings based on patient allergies (empty list if none) "
-                "8) 'condition_considerations': How existing conditions might affect this (empty string if none) "
-                "9) 'disclaimer': 'This is not a medical diagnosis. Please consult a doctor for proper evaluation.' "
-                "Use simple, everyday language. Avoid medical jargon. Be reassuring but honest about severity. "
-                "Respond with valid JSON only."
-            )
-        else:
-            system_instruction = (
-                f"You are an AI clinical decision support system. Analyzing symptoms described in {language}. "
-                f"{health_info}"
-                "Generate a comprehensive clinical assessment in JSON format: "
-                "1) 'symptoms_summary': Detailed symptom characterization with onset, duration, quality, severity "
-                "2) 'possible_conditions': Comprehensive differential diagnosis list with ICD-10 codes where applicable "
-                "3) 'severity_level': Low, Medium, High, or Critical with clinical reasoning "
-                "4) 'recommendations': Evidence-based treatment protocols and clinical pathways "
-                "5) 'urgent_care_needed': true or false with clinical justification "
-                "6) 'follow_up_questions': Targeted clinical history questions for differential narrowing "
-                "7) 'suggested_diagnostics': Recommended laboratory tests, imaging, or procedures "
-                "8) 'red_flags': Critical symptoms requiring immediate attention "
-                "9) 'allergy_warnings': Drug allergy considerations for treatment planning "
-                "10) 'condition_considerations': Comorbidity interactions and management considerations "
-                "11) 'references': Relevant clinical guidelines or literature "
-                "Use proper medical terminology. Be thorough and precise. "
-                "Respond with valid JSON only."
-            )
-        
-        response = client.models.generate_content(
-            model="gemini-2.5-pro",
-            contents=symptoms_text,
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                response_mime_type="application/json",
-                max_output_tokens=2048
+        contents, config = symptom_analysis_request(SYMPTOM_ESCALATION_MODEL, symptoms_text, language,
+                                                    health_context, user_role)
+        try:
+            response = generate_content(
+                "analyze_symptoms",
+                model=SYMPTOM_ESCALATION_MODEL,
+                contents=contents,
+                config=config
             )
-        )
+        except Exception as e:
+            # A severe or urgent fast report is still worth showing while pro is unavailable
+            if not is_busy_error(e) or reason not in ("severity", "urgent_care"):
+                raise
+            record_route("flash", time.perf_counter() - start, cost, "escalation_failed")
+            result["success"] = True
+            result["error"] = None
+            return result
+        cost += model_cost(SYMPTOM_ESCALATION_MODEL, response)
         
         result = json.loads(response.text)
+        record_route("pro" if reason == "routing_disabled" else "flash_to_pro", time.perf_counter() - start, cost, reason)
         result["success"] = True
         result["error"] = None
         return result
@@ -148,7 +611,7 @@ def analyze_symptoms(symptoms_text, language, health_context=None, user_role="Pa
     except Exception as e:
         return {
             "success": False,
-            "error": str(e),
+            "error": BUSY_MESSAGE if is_busy_error(e) else str(e),
             "symptoms_summary": "Error analyzing symptoms",
             "possible_conditions": [],
             "severity_level": "Unknown",
@@ -158,8 +621,13 @@ def analyze_symptoms(symptoms_text, language, health_context=None, user_role="Pa
         }
 
 def generate_prescription_translation(prescription_text, doctor_language, patient_language):
+    cache_key = translation_cache_key("generate_prescription_translation", prescription_text,
+                                      doctor_language, patient_language)
+    cached = translation_cache.get(cache_key)
+    if cached is not None:
+        return {"success": True, "translation": cached, "error": None}
+    
     try:
-        client = get_gemini_client()
         system_instruction = (
             f"You are a medical translator specializing in prescriptions. Translate the following prescription from {doctor_language} to {patient_language}. "
             "Maintain exact medication names, dosages, and timing. Format the translation clearly with: "
@@ -171,75 +639,166 @@ def generate_prescription_translation(prescription_text, doctor_language, patien
             "Use simple, clear language that patients can easily understand."
         )
         
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
+        response = generate_content(
+            "generate_prescription_translation",
+            model=TRANSLATION_MODEL,
             contents=prescription_text,
             config=types.GenerateContentConfig(
                 system_instruction=system_instruction,
                 max_output_tokens=2048
             )
         )
+        if response.text:
+            translation_cache.put(cache_key, response.text)
         return {"success": True, "translation": response.text, "error": None}
     except ValueError as e:
         return {"success": False, "translation": None, "error": str(e)}
     except Exception as e:
-        return {"success": False, "translation": None, "error": f"Translation failed: {str(e)}"}
+        return {"success": False, "translation": None, "error": error_message(e, "Translation failed")}
 
-def medical_chat_response(message, language, user_role, health_context=None, severity_level=None):
-    def _chat():
-        client = get_gemini_client()
-        
-        health_info = ""
-        if health_context and user_role == "Patient":
-            health_info = f"\n\nPatient Health Profile:\n{health_context}\n\nUse this information to provide personalized responses. Consider their allergies, existing conditions, and current medications when giving advice.\n\n"
-        
-        severity_guidance = ""
-        if severity_level:
-            if severity_level in ["High", "Critical"]:
-                severity_guidance = "IMPORTANT: This appears to be a high-severity situation. Strongly emphasize seeking immediate medical attention. Be direct about urgency while remaining calm. "
-            elif severity_level == "Medium":
-                severity_guidance = "This is a moderate concern. Recommend scheduling a doctor visit soon. Provide helpful interim guidance. "
-        
-        system_instruction = ""
-        if user_role == "Patient":
-            system_instruction = (
-                f"You are a compassionate AI health assistant helping patients in {language}. "
-                f"{health_info}"
-                f"{severity_guidance}"
-                "RESPONSE GUIDELINES FOR PATIENTS:\n"
-                "- Keep responses SHORT and SIMPLE (2-4 paragraphs max)\n"
-                "- Use everyday language, avoid medical jargon\n"
-                "- Focus on practical, actionable advice\n"
-                "- Include safety warnings prominently\n"
-                "- ALWAYS recommend consulting a doctor for serious concerns\n"
-                "- Be empathetic, warm, and reassuring\n"
-                "- If allergies/conditions are on file, warn about relevant precautions\n"
-                "- End with a clear next step the patient can take\n"
-                "- Include disclaimer: 'This is not medical advice. Please consult a doctor.'"
-            )
+TRANSLATION_INSTRUCTIONS = {
+    "translate_text": "Translate the following text. Maintain medical terminology accuracy and cultural sensitivity.",
+    "generate_prescription_translation": (
+        "Translate the following prescription. Maintain exact medication names, dosages, and timing. "
+        "Format each translation clearly with: 1) Medication names (keep generic/brand names) "
+        "2) Dosage and frequency 3) Duration 4) Special instructions 5) Warnings/precautions. "
+        "Use simple, clear language that patients can easily understand."
+    )
+}
+_translate_many_stats = {"calls": 0, "languages": 0, "cached": 0, "batched": 0, "fallbacks": 0}
+
+def get_translate_many_stats():
+    with _latency_lock:
+        return dict(_translate_many_stats)
+
+def count_translate_many(**counts):
+    with _latency_lock:
+        for name, count in counts.items():
+            _translate_many_stats[name] += count
+
+def request_batch_translation(text, source_language, target_languages, kind):
+    """
+    One JSON call translating text into every target; returns {target: translation}
+    for the targets that came back as non-empty strings (missing or malformed
+    ones are left out). Keys are language codes, since the display names are not
+    valid schema property names.
+    """
+    keys = {}
+    for i, target in enumerate(target_languages):
+        key = SUPPORTED_LANGUAGES.get(target, f"lang{i}")
+        keys[key if key not in keys else f"lang{i}"] = target
+    listing = "\n".join(f"- {key}: {target}" for key, target in keys.items())
+    system_instruction = (
+        f"You are a professional medical translator. {TRANSLATION_INSTRUCTIONS[kind]} "
+        f"The source language is {source_language}. Translate it into each of these languages:\n{listing}\n"
+        "Respond with a JSON object mapping each language code to its translation only, no explanations."
+    )
+    
+    response = generate_content(
+        "translate_many",
+        model=TRANSLATION_MODEL,
+        contents=text,
+        config=types.GenerateContentConfig(
+            system_instruction=system_instruction,
+            response_mime_type="application/json",
+            response_schema=types.Schema(
+                type=types.Type.OBJECT,
+                properties={key: types.Schema(type=types.Type.STRING) for key in keys},
+                required=list(keys)
+            ),
+            max_output_tokens=min(8192, 1024 * (len(keys) + 1))
+        )
+    )
+    try:
+        data = json.loads(response.text or "")
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {
+        target: data[key].strip()
+        for key, target in keys.items()
+        if isinstance(data.get(key), str) and data[key].strip()
+    }
+
+def translate_many(text, source_language, target_languages, prescription=False):
+    """
+    {target language: result} like calling translate_text (or, with
+    prescription=True, generate_prescription_translation) per target, but with
+    every uncached target translated in a single model call. Targets missing
+    from that reply, or the whole batch if it fails, are retried one language
+    at a time.
+    """
+    kind = "generate_prescription_translation" if prescription else "translate_text"
+    single = generate_prescription_translation if prescription else translate_text
+    target_languages = list(dict.fromkeys(target_languages))
+    results = {}
+    missing = []
+    for target in target_languages:
+        cached = translation_cache.get(translation_cache_key(kind, text, source_language, target))
+        if cached is not None:
+            results[target] = {"success": True, "translation": cached, "error": None}
         else:
-            system_instruction = (
-                f"You are an AI clinical assistant helping doctors in {language}. "
-                "RESPONSE GUIDELINES FOR DOCTORS:\n"
-                "- Provide DETAILED, comprehensive medical information\n"
-                "- Use proper medical terminology and classifications (ICD codes if relevant)\n"
-                "- Include differential diagnoses with reasoning\n"
-                "- Cite evidence-based guidelines and research when applicable\n"
-                "- Discuss mechanism of action, pharmacokinetics where relevant\n"
-                "- Include contraindications, drug interactions, dosing considerations\n"
-                "- Provide clinical decision support with risk stratification\n"
-                "- Suggest relevant diagnostic tests and their interpretation\n"
-                "- Reference treatment protocols and clinical pathways\n"
-                "- Be thorough and precise - doctors need complete information"
-            )
-        
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=message,
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                max_output_tokens=2048 if user_role == "Doctor" else 1024
-            )
+            missing.append(target)
+    count_translate_many(calls=1, languages=len(target_languages), cached=len(results))
+    
+    if len(missing) > 1:
+        try:
+            batch = request_batch_translation(text, source_language, missing, kind)
+        except Exception:
+            batch = {}
+        for target, translation in batch.items():
+            translation_cache.put(translation_cache_key(kind, text, source_language, target), translation)
+            results[target] = {"success": True, "translation": translation, "error": None}
+        count_translate_many(batched=len(batch))
+        missing = [target for target in missing if target not in batch]
+    
+    if missing:
+        count_translate_many(fallbacks=len(missing))
+        # Serially: translate_many_async already holds an _ai_pool worker, and
+        # extra threads here would go past AI_MAX_CONCURRENCY
+        for target in missing:
+            results[target] = single(text, source_language, target)
+    return {target: results[target] for target in target_languages}
+
+CHAT_MODEL = "gemini-2.5-flash"
+
+def new_conversation():
+    return conversation.Conversation(CHAT_HISTORY_TOKENS, CHAT_MAX_MESSAGES)
+
+def history_contents(history):
+    """Conversation.context() messages as model contents; the summary goes first as user-provided context."""
+    contents = []
+    for message in history or []:
+        if message["role"] == "summary":
+            contents.append(types.UserContent(parts=[types.Part.from_text(
+                text=f"Summary of our conversation so far:\n{message['content']}")]))
+        elif message["role"] == "user":
+            contents.append(types.UserContent(parts=[types.Part.from_text(text=message["content"])]))
+        else:
+            contents.append(types.ModelContent(parts=[types.Part.from_text(text=message["content"])]))
+    return contents
+
+def chat_request(message, language, user_role, health_context=None, severity_level=None, history=None):
+    contents = message
+    if history:
+        contents = history_contents(history) + [types.UserContent(parts=[types.Part.from_text(text=message)])]
+    return templated_request(
+        CHAT_MODEL,
+        prompt_templates.chat_template(user_role, language),
+        prompt_templates.chat_context(user_role, health_context, severity_level),
+        contents,
+        max_output_tokens=2048 if user_role == "Doctor" else 1024
+    )
+
+def medical_chat_response(message, language, user_role, health_context=None, severity_level=None, history=None):
+    def _chat():
+        contents, config = chat_request(message, language, user_role, health_context, severity_level, history)
+        response = generate_content(
+            "medical_chat_response",
+            model=CHAT_MODEL,
+            contents=contents,
+            config=config
         )
         return {"success": True, "response": response.text, "error": None}
     
@@ -251,65 +810,210 @@ def medical_chat_response(message, language, user_role, health_context=None, sev
     except ValueError as e:
         return {"success": False, "response": None, "error": str(e)}
     except Exception as e:
-        return {"success": False, "response": None, "error": f"Chat failed: {str(e)}"}
+        return {"success": False, "response": None, "error": error_message(e, "Chat failed")}
 
-def transcribe_audio(audio_file_path):
+def medical_chat_response_stream(message, language, user_role, health_context=None, severity_level=None,
+                                 history=None):
+    """Streaming medical_chat_response: a TextStream of the reply."""
+    contents, config = chat_request(message, language, user_role, health_context, severity_level, history)
+    return TextStream(stream_content(
+        "medical_chat_response_stream",
+        model=CHAT_MODEL,
+        contents=contents,
+        config=config
+    ), "Chat failed")
+
+def summarize_conversation(summary, messages, language):
+    """Fold chat messages into the running summary of the conversation."""
+    def _summarize():
+        transcript = "\n".join(
+            f"{'Patient/User' if message['role'] == 'user' else 'Assistant'}: {message['content']}"
+            for message in messages
+        )
+        system_instruction = (
+            f"You maintain a running summary of a medical chat in {language}. Update the summary with the new "
+            "messages. Keep every symptom, condition, medication, allergy, advice given and open question; "
+            "drop small talk. Reply with the updated summary only, in under 250 words."
+        )
+        response = generate_content(
+            "summarize_conversation",
+            model=CHAT_MODEL,
+            contents=f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}",
+            config=types.GenerateContentConfig(
+                system_instruction=system_instruction,
+                max_output_tokens=512
+            )
+        )
+        return {"success": True, "summary": response.text, "error": None}
+    
+    try:
+        return call_gemini_with_retry(_summarize)
+    except Exception as e:
+        return {"success": False, "summary": None, "error": error_message(e, "Summary failed")}
+
+def compact_conversation(chat, language):
     """
-    Note: Gemini supports audio transcription. We'll use gemini-2.5-flash for this.
+    Start summarizing the chat's oldest turns on _ai_pool once its window is
+    over budget. chat.context() waits for the summary and applies it; a
+    failure is retried next turn.
     """
+    def _summarize(summary, messages):
+        return summarize_conversation(summary, messages, language).get("summary")
+    return chat.start_compaction(_ai_pool.submit, _summarize)
+
+AUDIO_MODEL = "gemini-2.5-flash"
+AUDIO_PROMPT = "Transcribe this audio accurately. Only provide the transcription text, no explanations."
+
+@contextmanager
+def open_audio(audio):
+    """(binary file object at the start of the recording, size in bytes) for bytes, a path or a file-like object."""
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(audio), len(audio)
+    elif isinstance(audio, (str, os.PathLike)):
+        with open(audio, "rb") as f:
+            yield f, os.fstat(f.fileno()).st_size
+    elif getattr(audio, "seekable", lambda: False)():
+        start = audio.tell()
+        size = audio.seek(0, io.SEEK_END) - start
+        audio.seek(start)
+        yield audio, size
+    else:
+        # The Files API needs a seekable stream; spill to disk only past the inline size
+        with tempfile.SpooledTemporaryFile(max_size=AUDIO_INLINE_MAX_BYTES) as spool:
+            shutil.copyfileobj(audio, spool)
+            size = spool.tell()
+            spool.seek(0)
+            yield spool, size
+
+@contextmanager
+def audio_stage(stage, timings):
+    start = time.perf_counter()
     try:
-        client = get_gemini_client()
-        with open(audio_file_path, "rb") as f:
-            audio_bytes = f.read()
+        with track_latency(f"transcribe_audio.{stage}"):
+            yield
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+def upload_audio(f, mime_type):
+    """Resumable upload through the Files API, which reads and sends the stream in 8 MB chunks."""
+    start = f.tell()
+    
+    def _upload():
+        f.seek(start)
+        return get_gemini_client().files.upload(file=f, config=types.UploadFileConfig(mime_type=mime_type))
+    
+    return retry_policy.call("files", _upload)
+
+def wait_until_active(uploaded):
+    deadline = time.monotonic() + AUDIO_PROCESSING_TIMEOUT
+    while uploaded.state == types.FileState.PROCESSING:
+        if time.monotonic() > deadline:
+            raise TimeoutError("Audio upload is still processing")
+        time.sleep(0.5)
+        uploaded = get_gemini_client().files.get(name=uploaded.name)
+    if uploaded.state == types.FileState.FAILED:
+        raise RuntimeError("The audio file could not be processed")
+    return uploaded
+
+def delete_uploaded_file(name):
+    try:
+        get_gemini_client().files.delete(name=name)
+    except Exception:
+        # Uploaded files expire on their own after 48 hours
+        pass
+
+def transcribe_audio(audio, mime_type="audio/wav"):
+    """
+    Transcribe a recording given as bytes, a file-like object or a file path.
+    Recordings up to AUDIO_INLINE_MAX_BYTES go inline; larger ones are uploaded
+    through the Files API in chunks and referenced by URI. Seconds per stage
+    (read/upload/processing/transcribe) are returned in "timings" and recorded
+    as transcribe_audio.<stage> latency stats.
+    """
+    timings = {}
+    uploaded = None
+    try:
+        with open_audio(audio) as (f, size):
+            if size <= AUDIO_INLINE_MAX_BYTES:
+                with audio_stage("read", timings):
+                    data = audio if isinstance(audio, bytes) else f.read()
+                part = types.Part.from_bytes(data=data, mime_type=mime_type)
+            else:
+                with audio_stage("upload", timings):
+                    uploaded = upload_audio(f, mime_type)
+                with audio_stage("processing", timings):
+                    uploaded = wait_until_active(uploaded)
+                part = types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type or mime_type)
         
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[
-                types.Part.from_bytes(
-                    data=audio_bytes,
-                    mime_type="audio/wav",
-                ),
-                "Transcribe this audio accurately. Only provide the transcription text, no explanations."
-            ]
-        )
-        return {"success": True, "transcription": response.text, "error": None}
+        with audio_stage("transcribe", timings):
+            response = generate_content(
+                "transcribe_audio",
+                model=AUDIO_MODEL,
+                contents=[part, AUDIO_PROMPT]
+            )
+        return {"success": True, "transcription": response.text, "error": None, "timings": timings}
     except ValueError as e:
-        return {"success": False, "transcription": None, "error": str(e)}
+        return {"success": False, "transcription": None, "error": str(e), "timings": timings}
     except Exception as e:
-        return {"success": False, "transcription": None, "error": f"Transcription failed: {str(e)}"}
+        return {"success": False, "transcription": None, "error": error_message(e, "Transcription failed"),
+                "timings": timings}
+    finally:
+        if uploaded is not None:
+            threading.Thread(target=delete_uploaded_file, args=(uploaded.name,), daemon=True).start()
+
+def doctor_notes_config(patient_language, doctor_language):
+    system_instruction = (
+        f"You are an AI medical documentation assistant. The conversation was in {patient_language}. "
+        f"Generate structured clinical notes in {doctor_language} with: "
+        "1) Chief Complaint "
+        "2) History of Present Illness "
+        "3) Symptoms Summary "
+        "4) Assessment "
+        "5) Suggested Plan. "
+        "Use standard medical terminology and format."
+    )
+    return types.GenerateContentConfig(
+        system_instruction=system_instruction,
+        max_output_tokens=2048
+    )
 
 def generate_doctor_notes(conversation_text, patient_language, doctor_language):
     try:
-        client = get_gemini_client()
-        system_instruction = (
-            f"You are an AI medical documentation assistant. The conversation was in {patient_language}. "
-            f"Generate structured clinical notes in {doctor_language} with: "
-            "1) Chief Complaint "
-            "2) History of Present Illness "
-            "3) Symptoms Summary "
-            "4) Assessment "
-            "5) Suggested Plan. "
-            "Use standard medical terminology and format."
-        )
-        
-        response = client.models.generate_content(
+        response = generate_content(
+            "generate_doctor_notes",
             model="gemini-2.5-pro",
             contents=conversation_text,
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                max_output_tokens=2048
-            )
+            config=doctor_notes_config(patient_language, doctor_language)
         )
         return {"success": True, "notes": response.text, "error": None}
     except ValueError as e:
         return {"success": False, "notes": None, "error": str(e)}
     except Exception as e:
-        return {"success": False, "notes": None, "error": f"Note generation failed: {str(e)}"}
+        return {"success": False, "notes": None, "error": error_message(e, "Note generation failed")}
 
-def find_nearby_hospitals(city, specialty=None, language="English"):
+def generate_doctor_notes_stream(conversation_text, patient_language, doctor_language):
+    """Streaming generate_doctor_notes: a TextStream of the notes."""
+    return TextStream(stream_content(
+        "generate_doctor_notes_stream",
+        model="gemini-2.5-pro",
+        contents=conversation_text,
+        config=doctor_notes_config(patient_language, doctor_language)
+    ), "Note generation failed")
+
+def hospital_specialty(specialty):
+    return specialty if specialty and specialty != "All Specialties" else None
+
+def hospital_cache_key(city, specialty, language):
+    return ai_cache.cache_key("find_nearby_hospitals", ai_cache.normalize_text(city).lower(),
+                              hospital_specialty(specialty), language, HOSPITAL_MODEL, HOSPITAL_PROMPT_VERSION)
+
+def get_hospital_cache_stats():
+    return hospital_cache.stats()
+
+def fetch_hospitals(city, specialty=None, language="English"):
+    """Ask the model for hospitals and cache a successful answer."""
     def _find():
-        client = get_gemini_client()
-        specialty_filter = f" specializing in {specialty}" if specialty and specialty != "All Specialties" else ""
+        specialty_filter = f" specializing in {specialty}" if hospital_specialty(specialty) else ""
         system_instruction = (
             f"You are a healthcare location assistant helping find hospitals in India. "
             f"Find 5-8 hospitals{specialty_filter} near {city}, India. "
@@ -326,8 +1030,9 @@ def find_nearby_hospitals(city, specialty=None, language="English"):
             "Include a mix of government and private hospitals. Use realistic Indian hospital names and addresses."
         )
         
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
+        response = generate_content(
+            "find_nearby_hospitals",
+            model=HOSPITAL_MODEL,
             contents=f"Find hospitals near {city}{specialty_filter}",
             config=types.GenerateContentConfig(
                 system_instruction=system_instruction,
@@ -343,8 +1048,124 @@ def find_nearby_hospitals(city, specialty=None, language="English"):
         result = call_gemini_with_retry(_find)
         if isinstance(result, dict) and not result.get("success"):
             return result
+        if result.get("hospitals"):
+            hospital_cache.put(hospital_cache_key(city, specialty, language), result["hospitals"])
         return result
     except ValueError as e:
         return {"success": False, "hospitals": [], "error": str(e)}
     except Exception as e:
-        return {"success": False, "hospitals": [], "error": f"Hospital search failed: {str(e)}"}
+        return {"success": False, "hospitals": [], "error": error_message(e, "Hospital search failed")}
+
+def refresh_hospitals_in_background(city, specialty=None, language="English"):
+    """Re-fetch one search on a daemon thread; a no-op if that search is already being refreshed."""
+    key = hospital_cache_key(city, specialty, language)
+    with _hospital_refresh_lock:
+        if key in _hospital_refreshing:
+            return
+        _hospital_refreshing.add(key)
+    
+    def _refresh():
+        try:
+            with rate_limiter.lane(rate_limiter.PRIORITY_BACKGROUND):
+                fetch_hospitals(city, specialty, language)
+        finally:
+            with _hospital_refresh_lock:
+                _hospital_refreshing.discard(key)
+    
+    threading.Thread(target=_refresh, name="hospital-refresh", daemon=True).start()
+
+def find_nearby_hospitals(city, specialty=None, language="English"):
+    entry = hospital_cache.get_entry(hospital_cache_key(city, specialty, language))
+    if entry is not None:
+        if time.time() - entry["created_at"] > HOSPITAL_CACHE_TTL:
+            refresh_hospitals_in_background(city, specialty, language)
+        return {"success": True, "hospitals": entry["value"], "error": None}
+    
+    return inflight.do("find_nearby_hospitals", hospital_cache_key(city, specialty, language),
+                       lambda: fetch_hospitals(city, specialty, language))
+
+def warm_hospital_cache(languages=None, workers=HOSPITAL_WARMUP_WORKERS):
+    """
+    Fetch every built-in city x specialty search that has no fresh cache entry,
+    on `workers` daemon threads (city-wide searches first). Returns the threads.
+    """
+    pending = queue.Queue()
+    for language in languages or HOSPITAL_WARMUP_LANGUAGES:
+        for specialty in HOSPITAL_SPECIALTIES:
+            for city in INDIAN_CITIES:
+                pending.put((city, specialty, language))
+    
+    def _warm():
+        while True:
+            try:
+                city, specialty, language = pending.get_nowait()
+            except queue.Empty:
+                return
+            entry = hospital_cache.get_entry(hospital_cache_key(city, specialty, language), record_stats=False)
+            if entry is None or time.time() - entry["created_at"] > HOSPITAL_CACHE_TTL:
+                with rate_limiter.lane(rate_limiter.PRIORITY_BACKGROUND):
+                    fetch_hospitals(city, specialty, language)
+    
+    threads = [threading.Thread(target=_warm, name="hospital-warmup", daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def start_hospital_cache_warmup():
+    """Start warm_hospital_cache once per process (only when an API key is configured)."""
+    global _hospital_warmup_started
+    with _hospital_refresh_lock:
+        if _hospital_warmup_started or not validate_api_key()[0]:
+            return
+        _hospital_warmup_started = True
+    warm_hospital_cache()
+
+async def run_in_ai_pool(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_ai_pool, functools.partial(func, *args, **kwargs))
+
+async def translate_text_async(text, source_language, target_language):
+    return await run_in_ai_pool(translate_text, text, source_language, target_language)
+
+async def analyze_symptoms_async(symptoms_text, language, health_context=None, user_role="Patient"):
+    return await run_in_ai_pool(analyze_symptoms, symptoms_text, language, health_context, user_role)
+
+async def generate_prescription_translation_async(prescription_text, doctor_language, patient_language):
+    return await run_in_ai_pool(generate_prescription_translation, prescription_text, doctor_language, patient_language)
+
+async def translate_many_async(text, source_language, target_languages, prescription=False):
+    return await run_in_ai_pool(translate_many, text, source_language, target_languages, prescription)
+
+async def medical_chat_response_async(message, language, user_role, health_context=None, severity_level=None,
+                                      history=None):
+    return await run_in_ai_pool(medical_chat_response, message, language, user_role, health_context, severity_level,
+                                history)
+
+async def transcribe_audio_async(audio, mime_type="audio/wav"):
+    return await run_in_ai_pool(transcribe_audio, audio, mime_type)
+
+async def generate_doctor_notes_async(conversation_text, patient_language, doctor_language):
+    return await run_in_ai_pool(generate_doctor_notes, conversation_text, patient_language, doctor_language)
+
+async def find_nearby_hospitals_async(city, specialty=None, language="English"):
+    return await run_in_ai_pool(find_nearby_hospitals, city, specialty, language)
+
+def run_concurrently(*calls):
+    """
+    Run independent ai_helper coroutines (the *_async functions) at once from
+    blocking code such as a Streamlit script; returns their results in order.
+    """
+    async def _gather():
+        return await asyncio.gather(*calls)
+    return asyncio.run(_gather())
+
+async def translate_to_languages_async(text, source_language, target_languages):
+    """{target language: translate_text result}, translated concurrently."""
+    target_languages = list(dict.fromkeys(target_languages))
+    results = await asyncio.gather(*[
+        translate_text_async(text, source_language, target) for target in target_languages
+    ])
+    return dict(zip(target_languages, results))
+
+def translate_to_languages(text, source_language, target_languages):
+    return run_concurrently(translate_to_languages_async(text, source_language, target_languages))[0]
@@ -19,6 +19,7 @@ from fpdf import FPDF
 import ai_helper
 import data_manager
 import auth_manager
+import translation_jobs
 from translations import get_text, get_greeting, get_nav_items, TRANSLATIONS
 
 
@@ -469,7 +470,7 @@ def initialize_session_state():
     if 'patient_name' not in st.session_state:
         st.session_state.patient_name = ""
     if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []
+        st.session_state.chat_history = ai_helper.new_conversation()
     if 'translation_chat' not in st.session_state:
         st.session_state.translation_chat = []
     if 'auth_page' not in st.session_state:
@@ -938,6 +939,10 @@ def sidebar_navigation():
                 auth_manager.update_user(st.session_state.current_user['id'], language=selected_language)
                 st.session_state.current_user['language'] = selected_language
                 st.toast(f"Language saved: {selected_language}")
+                if st.session_state.user_role == "Patient" and st.session_state.patient_name:
+                    # Saved prescriptions and records follow in the background
+                    translation_jobs.enqueue(st.session_state.patient_name, selected_language)
+                    translation_jobs.start_background_runner()
             st.rerun()
         st.session_state.user_language = selected_language
         
@@ -1308,12 +1313,7 @@ def symptom_checker_page():
             
             if st.button(f"🔄 {get_text('transcribe_analyze', lang)}", type="primary"):
                 with st.spinner("Processing audio..."):
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as fp:
-                        fp.write(audio_bytes)
-                        fp.flush()
-                        
-                        result = ai_helper.transcribe_audio(fp.name)
-                        os.unlink(fp.name)
+                    result = ai_helper.transcribe_audio(audio_bytes, mime_type="audio/wav")
                     
                     if result.get("success"):
                         transcription = result.get("transcription")
@@ -1411,29 +1411,35 @@ def ai_chat_page():
     user_input = st.chat_input(get_text('type_question', lang))
     
     if user_input:
-        st.session_state.chat_history.append({"role": "user", "content": user_input})
+        chat = st.session_state.chat_history
+        history = chat.context()
+        chat.add("user", user_input)
         
         with st.chat_message("user"):
             st.write(user_input)
         
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                user_id = st.session_state.current_user.get('id') if st.session_state.current_user else None
-                health_context = data_manager.get_health_context_for_ai(user_id) if user_id else None
-                result = ai_helper.medical_chat_response(
-                    user_input,
-                    st.session_state.user_language,
-                    st.session_state.user_role,
-                    health_context
-                )
-                if result.get("success"):
-                    response = result.get("response")
-                    st.write(response)
-                    st.session_state.chat_history.append({"role": "assistant", "content": response})
-                else:
-                    error_msg = f"Error: {result.get('error')}"
-                    st.error(error_msg)
-                    st.session_state.chat_history.append({"role": "assistant", "content": error_msg})
+            user_id = st.session_state.current_user.get('id') if st.session_state.current_user else None
+            health_context = data_manager.get_health_context_for_ai(user_id) if user_id else None
+            stream = ai_helper.medical_chat_response_stream(
+                user_input,
+                st.session_state.user_language,
+                st.session_state.user_role,
+                health_context,
+                history=history
+            )
+            st.write_stream(stream)
+            if stream.success:
+                chat.add("assistant", stream.text)
+            else:
+                error_msg = f"Error: {stream.error}"
+                st.error(error_msg)
+                content = f"{stream.text}\n\n{error_msg}" if stream.text else error_msg
+                chat.add("assistant", content)
+        
+        # In the background once the reply is on screen; the next turn's
+        # chat.context() picks the summary up (waiting only if it is still running)
+        ai_helper.compact_conversation(chat, st.session_state.user_language)
 
 def translation_chat_page():
     inject_custom_css()
@@ -1477,6 +1483,8 @@ def translation_chat_page():
             st.success(msg["original"])
             if msg.get("translation"):
                 st.markdown(f"*Translation to {patient_lang}:* {msg['translation']}")
+            for extra_lang, extra_translation in msg.get("extra_translations", {}).items():
+                st.markdown(f"*Translation to {extra_lang}:* {extra_translation}")
         st.markdown("---")
     
     tab1, tab2 = st.tabs(["👤 Patient Message", "👨‍⚕️ Doctor Message"])
@@ -1500,16 +1508,26 @@ def translation_chat_page():
     
     with tab2:
         doctor_message = st.text_area(f"Doctor speaks in {doctor_lang}", key="doctor_msg")
+        extra_langs = st.multiselect(
+            "Also translate for family members in",
+            options=[l for l in ai_helper.SUPPORTED_LANGUAGES.keys() if l not in (doctor_lang, patient_lang)],
+            key="doctor_extra_langs"
+        )
         if st.button("Send & Translate", key="doctor_send"):
             if doctor_message:
                 with st.spinner("Translating..."):
-                    result = ai_helper.translate_text(doctor_message, doctor_lang, patient_lang)
+                    results = ai_helper.translate_many(doctor_message, doctor_lang, [patient_lang] + extra_langs)
+                    result = results[patient_lang]
                     if result.get("success"):
                         translation = result.get("translation")
                         st.session_state.translation_chat.append({
                             "speaker": "Doctor",
                             "original": doctor_message,
-                            "translation": translation
+                            "translation": translation,
+                            "extra_translations": {
+                                l: r["translation"] for l, r in results.items()
+                                if l != patient_lang and r.get("success")
+                            }
                         })
                         st.rerun()
                     else:
@@ -1546,6 +1564,11 @@ def prescription_page():
                 get_text('translate_to_patient_lang', lang),
                 options=list(ai_helper.SUPPORTED_LANGUAGES.keys())
             )
+            extra_languages = st.multiselect(
+                "Also translate into",
+                options=[l for l in ai_helper.SUPPORTED_LANGUAGES.keys() if l != patient_language],
+                key="rx_extra_langs"
+            )
         
         prescription_text = f"""
 Medication: {medication}
@@ -1556,11 +1579,13 @@ Instructions: {instructions}
         if st.button("💾 Generate & Save Prescription", type="primary"):
             if patient_name and medication:
                 with st.spinner("Translating prescription..."):
-                    result = ai_helper.generate_prescription_translation(
+                    results = ai_helper.translate_many(
                         prescription_text,
                         st.session_state.user_language,
-                        patient_language
+                        [patient_language] + extra_languages,
+                        prescription=True
                     )
+                    result = results[patient_language]
                     
                     if result.get("success"):
                         translated = result.get("translation")
@@ -1583,6 +1608,14 @@ Instructions: {instructions}
                         
                         st.markdown(f"**Translated ({patient_language}):**")
                         st.info(translated)
+                        
+                        for extra_language in extra_languages:
+                            extra = results[extra_language]
+                            st.markdown(f"**Translated ({extra_language}):**")
+                            if extra.get("success"):
+                                st.info(extra.get("translation"))
+                            else:
+                                st.error(f"Translation error: {extra.get('error')}")
                     else:
                         st.error(f"Translation error: {result.get('error')}")
             else:
@@ -1702,6 +1735,9 @@ def health_records_page():
                     st.markdown(f"**Date:** {record['date']}")
                     st.markdown(f"**Language:** {record['language']}")
                     st.markdown(f"**Description:** {record['description']}")
+                    if record.get('translated_text'):
+                        st.markdown(f"**Translation ({record['translated_language']}):**")
+                        st.info(record['translated_text'])
                     
                     if record.get('report_data'):
                         if isinstance(record['report_data'], dict):
@@ -2170,36 +2206,14 @@ def find_hospitals_page():
             col1, col2 = st.columns([2, 1])
             
             with col1:
-                indian_cities = [
-                    "Mumbai", "Delhi", "Bangalore", "Hyderabad", "Chennai",
-                    "Kolkata", "Pune", "Ahmedabad", "Jaipur", "Lucknow",
-                    "Chandigarh", "Bhopal", "Indore", "Nagpur", "Patna",
-                    "Thiruvananthapuram", "Kochi", "Coimbatore", "Visakhapatnam",
-                    "Guwahati", "Bhubaneswar", "Ranchi", "Dehradun", "Shimla"
-                ]
-                city = st.selectbox("📍 Select City", options=indian_cities, index=0)
+                city = st.selectbox("📍 Select City", options=ai_helper.INDIAN_CITIES, index=0)
                 
                 custom_city = st.text_input("Or enter a different city/area", placeholder="e.g., Varanasi, Noida, Gurugram")
                 if custom_city:
                     city = custom_city
             
             with col2:
-                specialties = [
-                    "All Specialties",
-                    "General Medicine",
-                    "Cardiology",
-                    "Orthopedics",
-                    "Pediatrics",
-                    "Gynecology",
-                    "Neurology",
-                    "Oncology",
-                    "Dermatology",
-                    "ENT",
-                    "Ophthalmology",
-                    "Psychiatry",
-                    "Emergency Care"
-                ]
-                specialty = st.selectbox("🏷️ Specialty Filter", options=specialties)
+                specialty = st.selectbox("🏷️ Specialty Filter", options=ai_helper.HOSPITAL_SPECIALTIES)
             
             if st.button("🔍 Search Hospitals", type="primary", use_container_width=True):
                 with st.spinner("Finding hospitals near you..."):
@@ -2941,6 +2955,7 @@ def home_page():
 
 def main():
     data_manager.ensure_data_directory()
+    ai_helper.start_hospital_cache_warmup()
     initialize_session_state()
     
     if not st.session_state.authenticated:
@@ -1,134 +1,327 @@
 import json
 import os
 import hashlib
+import hmac
 import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import storage
 
-DATA_DIR = "/tmp/health_data"
+DATA_DIR = os.environ.get("HEALTH_DATA_DIR", "/tmp/health_data")
 
 USERS_FILE = os.path.join(DATA_DIR, "users.json")
+# Persisted email -> user id map, stamped with the users.json (mtime_ns, size) it was built from
+EMAIL_INDEX_FILE = os.path.join(DATA_DIR, "users_email_index.json")
+# Append-only log of activity timestamps (last_login, ...) that is folded into users.json lazily
+ACTIVITY_LOG_FILE = os.path.join(DATA_DIR, "user_activity.jsonl")
+ACTIVITY_FOLD_BYTES = 256 * 1024
+
+# Password key derivation. "scrypt" (memory-hard, default) or "pbkdf2_sha256".
+# Users hashed with older settings (including the original single SHA-256
+# round) are rehashed with these on their next successful login.
+PASSWORD_KDF = os.environ.get("PASSWORD_KDF", "scrypt")
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600_000
+# KDF work runs on a small dedicated pool so a burst of logins can't take
+# every CPU away from Streamlit's script threads; callers that can't get a
+# slot within KDF_QUEUE_TIMEOUT seconds are told to retry.
+KDF_WORKERS = int(os.environ.get("KDF_WORKERS", "2"))
+KDF_MAX_PENDING = KDF_WORKERS * 8
+KDF_QUEUE_TIMEOUT = 10
+
+PRIVATE_FIELDS = ['password_hash', 'salt', 'password_kdf']
 
 def ensure_users_file():
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
-    
-    if not os.path.exists(USERS_FILE):
-        with open(USERS_FILE, 'w') as f:
-            json.dump([], f)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    storage.ensure_json_file(USERS_FILE, [])
+
+def _cached_users():
+    return storage.cache.get(USERS_FILE, (USERS_FILE,), lambda: storage.read_json(USERS_FILE, []))
 
 def load_users():
     ensure_users_file()
-    try:
-        with open(USERS_FILE, 'r') as f:
-            return json.load(f)
-    except:
-        return []
+    users = storage.copy_records(_cached_users())
+    activity = load_activity()
+    for user in users:
+        if user['id'] in activity:
+            user.update(activity[user['id']])
+    return users
 
 def save_users(users):
+    """Write users.json, folding in (and then clearing) the activity log."""
+    ensure_users_file()
+    with storage.file_lock(USERS_FILE), storage.file_lock(ACTIVITY_LOG_FILE):
+        activity = read_activity_log()
+        for user in users:
+            if user['id'] in activity:
+                user.update(activity[user['id']])
+        storage.write_json(USERS_FILE, users)
+        storage.cache.put(USERS_FILE, (USERS_FILE,), storage.copy_records(users))
+        save_email_index(users)
+        if os.path.exists(ACTIVITY_LOG_FILE):
+            os.remove(ACTIVITY_LOG_FILE)
+
+def read_activity_log():
+    activity = {}
+    try:
+        with open(ACTIVITY_LOG_FILE, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                activity.setdefault(entry['user_id'], {}).update(entry['fields'])
+    except FileNotFoundError:
+        pass
+    return activity
+
+def load_activity():
+    """user id -> latest logged activity fields not yet folded into users.json"""
+    return storage.cache.get(ACTIVITY_LOG_FILE, (ACTIVITY_LOG_FILE,), read_activity_log)
+
+def record_activity(user_id, **fields):
+    """Log activity timestamps without rewriting users.json; they are merged in on the next save_users."""
     ensure_users_file()
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=2)
+    with storage.file_lock(ACTIVITY_LOG_FILE):
+        with open(ACTIVITY_LOG_FILE, 'a') as f:
+            f.write(json.dumps({"user_id": user_id, "fields": fields}) + "\n")
+            size = f.tell()
+    
+    if size > ACTIVITY_FOLD_BYTES:
+        fold_activity()
+
+def fold_activity():
+    with storage.file_lock(USERS_FILE):
+        save_users(load_users())
+
+def build_email_index(users):
+    emails = {}
+    for user in users:
+        emails.setdefault(user['email'].lower(), user['id'])
+    return emails
+
+def _users_signature():
+    return list(storage.file_signature((USERS_FILE,))[0] or [])
+
+def save_email_index(users):
+    index = {"users_signature": _users_signature(), "emails": build_email_index(users)}
+    storage.write_json(EMAIL_INDEX_FILE, index)
+    storage.cache.put(EMAIL_INDEX_FILE, (EMAIL_INDEX_FILE,), index)
+
+def get_email_index():
+    """email -> user id. Rebuilt only if users.json was changed by something other than save_users."""
+    ensure_users_file()
+    index = storage.cache.get(EMAIL_INDEX_FILE, (EMAIL_INDEX_FILE,),
+                              lambda: storage.read_json(EMAIL_INDEX_FILE, {}))
+    if index.get("users_signature") != _users_signature():
+        with storage.file_lock(USERS_FILE):
+            save_email_index(_cached_users())
+            index = storage.cache.get(EMAIL_INDEX_FILE, (EMAIL_INDEX_FILE,),
+                                      lambda: storage.read_json(EMAIL_INDEX_FILE, {}))
+    return index["emails"]
+
+def get_user_record(user_id):
+    """Full stored user (including password fields) by id, from a cached id map."""
+    ensure_users_file()
+    users_by_id = storage.cache.derived(
+        USERS_FILE, (USERS_FILE,), lambda: storage.read_json(USERS_FILE, []), "by_id",
+        lambda users: {u['id']: u for u in reversed(users)}
+    )
+    user = users_by_id.get(user_id)
+    if user is None:
+        return None
+    user = dict(user)
+    user.update(load_activity().get(user_id, {}))
+    return user
+
+def find_user_by_email(email):
+    user_id = get_email_index().get(email.lower().strip())
+    if user_id is None:
+        return None
+    return get_user_record(user_id)
+
+class KdfBusyError(Exception):
+    pass
+
+_kdf_pool = ThreadPoolExecutor(max_workers=KDF_WORKERS, thread_name_prefix="password-kdf")
+_kdf_slots = threading.BoundedSemaphore(KDF_MAX_PENDING)
+
+def current_kdf():
+    if PASSWORD_KDF == "pbkdf2_sha256":
+        return {"algorithm": "pbkdf2_sha256", "iterations": PBKDF2_ITERATIONS}
+    return {"algorithm": "scrypt", "n": SCRYPT_N, "r": SCRYPT_R, "p": SCRYPT_P}
+
+def derive_key(password, salt, kdf):
+    algorithm = kdf.get("algorithm") if kdf else "sha256"
+    if algorithm == "scrypt":
+        key = hashlib.scrypt(password.encode(), salt=salt.encode(), n=kdf["n"], r=kdf["r"], p=kdf["p"],
+                             maxmem=256 * kdf["n"] * kdf["r"], dklen=32)
+        return key.hex()
+    if algorithm == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), kdf["iterations"]).hex()
+    # Legacy accounts: a single SHA-256 round over password + salt
+    return hashlib.sha256((password + salt).encode()).hexdigest()
+
+def run_kdf(password, salt, kdf):
+    """Run derive_key on the bounded KDF pool."""
+    if not _kdf_slots.acquire(timeout=KDF_QUEUE_TIMEOUT):
+        raise KdfBusyError("Too many sign-in requests right now. Please try again in a moment.")
+    try:
+        return _kdf_pool.submit(derive_key, password, salt, kdf).result()
+    finally:
+        _kdf_slots.release()
 
-def hash_password(password, salt=None):
+def hash_password(password, salt=None, kdf=None):
     if salt is None:
         salt = secrets.token_hex(16)
-    password_hash = hashlib.sha256((password + salt).encode()).hexdigest()
+    password_hash = run_kdf(password, salt, kdf or current_kdf())
     return password_hash, salt
 
-def verify_password(password, stored_hash, salt):
-    password_hash, _ = hash_password(password, salt)
-    return password_hash == stored_hash
+def verify_password(password, stored_hash, salt, kdf=None):
+    password_hash = run_kdf(password, salt, kdf)
+    return hmac.compare_digest(password_hash, stored_hash)
+
+def needs_rehash(user):
+    return user.get('password_kdf') != current_kdf()
+
+def set_password(user, password):
+    kdf = current_kdf()
+    user['password_hash'], user['salt'] = hash_password(password, kdf=kdf)
+    user['password_kdf'] = kdf
+
+def rehash_password(user_id, password, password_hash):
+    """
+    Upgrade a user's stored hash to the current KDF settings after a
+    successful login against password_hash. Skipped if the password was
+    changed meanwhile.
+    """
+    updated = {}
+    set_password(updated, password)
+    with storage.file_lock(USERS_FILE):
+        users = load_users()
+        for user in users:
+            if user['id'] == user_id:
+                if user['password_hash'] != password_hash:
+                    return
+                user.update(updated)
+                save_users(users)
+                return
 
 def create_user(name, email, password, role, language="English", phone=""):
-    users = load_users()
-    
+    ensure_users_file()
     email_lower = email.lower().strip()
-    if any(u['email'].lower() == email_lower for u in users):
+    if email_lower in get_email_index():
         return {"success": False, "error": "Email already registered. Please sign in instead."}
     
-    password_hash, salt = hash_password(password)
-    
-    user = {
-        "id": len(users) + 1,
-        "name": name.strip(),
-        "email": email_lower,
-        "password_hash": password_hash,
-        "salt": salt,
-        "role": role,
-        "language": language,
-        "phone": phone,
-        "created_at": datetime.now().isoformat(),
-        "last_login": None
-    }
-    
-    users.append(user)
-    save_users(users)
+    # Hash before taking the users lock; the KDF is deliberately slow
+    credentials = {}
+    try:
+        set_password(credentials, password)
+    except KdfBusyError as e:
+        return {"success": False, "error": str(e)}
     
-    safe_user = {k: v for k, v in user.items() if k not in ['password_hash', 'salt']}
-    return {"success": True, "user": safe_user}
+    with storage.file_lock(USERS_FILE):
+        if email_lower in get_email_index():
+            return {"success": False, "error": "Email already registered. Please sign in instead."}
+        
+        users = load_users()
+        
+        user = {
+            "id": storage.allocate_id(USERS_FILE, lambda: storage.max_id(users)),
+            "name": name.strip(),
+            "email": email_lower,
+            "password_hash": credentials['password_hash'],
+            "salt": credentials['salt'],
+            "password_kdf": credentials['password_kdf'],
+            "role": role,
+            "language": language,
+            "phone": phone,
+            "created_at": datetime.now().isoformat(),
+            "last_login": None
+        }
+        
+        users.append(user)
+        save_users(users)
+        
+        safe_user = {k: v for k, v in user.items() if k not in PRIVATE_FIELDS}
+        return {"success": True, "user": safe_user}
 
 def authenticate_user(email, password):
-    users = load_users()
-    
-    email_lower = email.lower().strip()
-    user = None
-    for u in users:
-        if u['email'].lower() == email_lower:
-            user = u
-            break
+    user = find_user_by_email(email)
     
     if not user:
         return {"success": False, "error": "Email not found. Please sign up first."}
     
-    if not verify_password(password, user['password_hash'], user['salt']):
-        return {"success": False, "error": "Incorrect password. Please try again."}
+    try:
+        if not verify_password(password, user['password_hash'], user['salt'], user.get('password_kdf')):
+            return {"success": False, "error": "Incorrect password. Please try again."}
+        
+        if needs_rehash(user):
+            rehash_password(user['id'], password, user['password_hash'])
+    except KdfBusyError as e:
+        return {"success": False, "error": str(e)}
     
     user['last_login'] = datetime.now().isoformat()
-    save_users(users)
+    record_activity(user['id'], last_login=user['last_login'])
     
-    safe_user = {k: v for k, v in user.items() if k not in ['password_hash', 'salt']}
+    safe_user = {k: v for k, v in user.items() if k not in PRIVATE_FIELDS}
     return {"success": True, "user": safe_user}
 
 def get_user_by_email(email):
-    users = load_users()
-    email_lower = email.lower().strip()
+    user = find_user_by_email(email)
     
-    for user in users:
-        if user['email'].lower() == email_lower:
-            safe_user = {k: v for k, v in user.items() if k not in ['password_hash', 'salt']}
-            return safe_user
+    if user:
+        safe_user = {k: v for k, v in user.items() if k not in PRIVATE_FIELDS}
+        return safe_user
     
     return None
 
 def update_user(user_id, **kwargs):
-    users = load_users()
-    
-    for user in users:
-        if user['id'] == user_id:
-            for key, value in kwargs.items():
-                if key not in ['password_hash', 'salt', 'id']:
-                    user[key] = value
-            save_users(users)
-            safe_user = {k: v for k, v in user.items() if k not in ['password_hash', 'salt']}
-            return {"success": True, "user": safe_user}
-    
-    return {"success": False, "error": "User not found"}
+    ensure_users_file()
+    with storage.file_lock(USERS_FILE):
+        users = load_users()
+        
+        for user in users:
+            if user['id'] == user_id:
+                for key, value in kwargs.items():
+                    if key not in PRIVATE_FIELDS + ['id']:
+                        user[key] = value
+                save_users(users)
+                safe_user = {k: v for k, v in user.items() if k not in PRIVATE_FIELDS}
+                return {"success": True, "user": safe_user}
+        
+        return {"success": False, "error": "User not found"}
 
 def change_password(user_id, old_password, new_password):
-    users = load_users()
+    ensure_users_file()
+    user = next((u for u in load_users() if u['id'] == user_id), None)
+    if user is None:
+        return {"success": False, "error": "User not found"}
     
-    for user in users:
-        if user['id'] == user_id:
-            if not verify_password(old_password, user['password_hash'], user['salt']):
-                return {"success": False, "error": "Current password is incorrect"}
-            
-            new_hash, new_salt = hash_password(new_password)
-            user['password_hash'] = new_hash
-            user['salt'] = new_salt
-            save_users(users)
-            return {"success": True}
+    # Verify and hash before taking the users lock; the KDF is deliberately slow
+    credentials = {}
+    try:
+        if not verify_password(old_password, user['password_hash'], user['salt'], user.get('password_kdf')):
+            return {"success": False, "error": "Current password is incorrect"}
+        set_password(credentials, new_password)
+    except KdfBusyError as e:
+        return {"success": False, "error": str(e)}
     
-    return {"success": False, "error": "User not found"}
+    with storage.file_lock(USERS_FILE):
+        users = load_users()
+        
+        for stored in users:
+            if stored['id'] == user_id:
+                if stored['password_hash'] != user['password_hash']:
+                    return {"success": False, "error": "Password was changed elsewhere. Please try again."}
+                stored.update(credentials)
+                save_users(users)
+                return {"success": True}
+        
+        return {"success": False, "error": "User not found"}
 
 def get_all_users_by_role(role):
     users = load_users()
@@ -136,7 +329,7 @@ def get_all_users_by_role(role):
     
     for user in users:
         if user['role'] == role:
-            safe_user = {k: v for k, v in user.items() if k not in ['password_hash', 'salt']}
+            safe_user = {k: v for k, v in user.items() if k not in PRIVATE_FIELDS}
             filtered.append(safe_user)
     
     return filtered
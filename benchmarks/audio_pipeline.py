@@ -0,0 +1,87 @@
+"""
+transcribe_audio for recordings of several sizes: the old path (write the
+recorder's bytes to a temp file, read it back, send it inline) against the
+new pipeline (bytes inline up to AUDIO_INLINE_MAX_BYTES, chunked Files API
+upload above it). Reports wall time, per-stage timings and peak Python
+memory (tracemalloc). The stub server runs in a separate process so its
+buffers are not counted.
+
+    python benchmarks/audio_pipeline.py --sizes-mb 0.5,8,32
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wav_bytes(size):
+    # 16 kHz mono 16-bit header followed by silence
+    data_size = size - 44
+    header = (b"RIFF" + (36 + data_size).to_bytes(4, "little") + b"WAVEfmt " + (16).to_bytes(4, "little")
+              + (1).to_bytes(2, "little") + (1).to_bytes(2, "little") + (16000).to_bytes(4, "little")
+              + (32000).to_bytes(4, "little") + (2).to_bytes(2, "little") + (16).to_bytes(2, "little")
+              + b"data" + data_size.to_bytes(4, "little"))
+    return header + bytes(data_size)
+
+def old_path(ai_helper, audio_bytes):
+    """symptom_checker_page before: temp file round trip, whole file read and sent inline."""
+    inline_max = ai_helper.AUDIO_INLINE_MAX_BYTES
+    ai_helper.AUDIO_INLINE_MAX_BYTES = float("inf")
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as fp:
+            fp.write(audio_bytes)
+            fp.flush()
+            result = ai_helper.transcribe_audio(fp.name)
+            os.unlink(fp.name)
+        return result
+    finally:
+        ai_helper.AUDIO_INLINE_MAX_BYTES = inline_max
+
+def measure(label, size_mb, call):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = call()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert result["success"], result
+    stages = ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in result["timings"].items())
+    print(f"{label:8} | {size_mb:5.1f} MB | {elapsed * 1000:7.1f} ms | peak {peak / 2**20:6.1f} MiB | {stages}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes-mb", default="0.5,8,32")
+    args = parser.parse_args()
+
+    port = free_port()
+    stub = subprocess.Popen([sys.executable, os.path.join(BENCHMARKS, "gemini_stub.py"), "--port", str(port),
+                             "--reply", "I have had a headache since yesterday"])
+    try:
+        time.sleep(1.0)
+        os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{port}"
+        os.environ.setdefault("GEMINI_API_KEY", "stub")
+        import ai_helper
+
+        ai_helper.rate_limit.limits = {}
+        ai_helper.transcribe_audio(wav_bytes(1024))
+        for size_mb in [float(n) for n in args.sizes_mb.split(",")]:
+            audio_bytes = wav_bytes(int(size_mb * 2**20))
+            measure("old", size_mb, lambda: old_path(ai_helper, audio_bytes))
+            measure("pipeline", size_mb, lambda: ai_helper.transcribe_audio(audio_bytes))
+    finally:
+        stub.terminate()
+
+if __name__ == "__main__":
+    main()
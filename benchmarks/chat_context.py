@@ -0,0 +1,85 @@
+"""
+Per-turn latency and session memory of AI Chat over long conversations:
+the managed history (running summary + token-budgeted window, capped
+transcript) against sending the whole unbounded history every turn. Runs
+against the local stub, which charges --input-token-delay per input token.
+
+    python benchmarks/chat_context.py --turns 10,100,300,1000 --input-token-delay 0.000005
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gemini_stub import start_stub
+
+REPLY = " ".join(["Drink plenty of fluids, rest, and monitor your temperature twice a day."] * 4)
+
+def deep_size(obj, seen=None):
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)) or type(obj).__name__ == "deque":
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    return size
+
+def run(ai_helper, label, turns, managed):
+    chat = ai_helper.new_conversation() if managed else []
+    latencies = []
+    for i in range(turns):
+        message = f"Turn {i}: my fever is {38 + i % 3} degrees and I still have a headache, what should I do?"
+        start = time.perf_counter()
+        history = chat.context() if managed else list(chat)
+        result = ai_helper.medical_chat_response(message, "English", "Patient", history=history)
+        assert result["success"], result
+        if managed:
+            chat.add("user", message)
+            chat.add("assistant", result["response"])
+            ai_helper.compact_conversation(chat, "English")
+        else:
+            chat.append({"role": "user", "content": message})
+            chat.append({"role": "assistant", "content": result["response"]})
+        latencies.append(time.perf_counter() - start)
+
+    last = latencies[-max(1, turns // 10):]
+    print(f"{label:9} | {turns:5d} turns | mean {statistics.mean(latencies) * 1000:7.1f} ms/turn "
+          f"| last 10% {statistics.mean(last) * 1000:7.1f} ms/turn | session {deep_size(chat) / 1024:8.1f} KiB")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", default="10,100,1000")
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--input-token-delay", type=float, default=0.000005, help="stub seconds per input token")
+    parser.add_argument("--full-max-turns", type=int, default=300,
+                        help="skip the full-history run above this many turns (its cost grows with the square)")
+    args = parser.parse_args()
+
+    server, base_url = start_stub(reply_text=REPLY, latency=args.latency, input_token_delay=args.input_token_delay)
+    os.environ["GEMINI_BASE_URL"] = base_url
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+    import ai_helper
+
+    ai_helper.rate_limit.limits = {}
+    for turns in [int(n) for n in args.turns.split(",")]:
+        if turns <= args.full_max_turns:
+            run(ai_helper, "full", turns, managed=False)
+        else:
+            print(f"full      | {turns:5d} turns | skipped (--full-max-turns {args.full_max_turns})")
+        run(ai_helper, "managed", turns, managed=True)
+    summaries = ai_helper.get_latency_stats().get("summarize_conversation", {})
+    print(f"summarize_conversation calls: {summaries.get('calls', 0)}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
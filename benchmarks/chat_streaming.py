@@ -0,0 +1,52 @@
+"""
+Time to first chunk versus time to full reply for medical_chat_response
+(blocking) and medical_chat_response_stream, against a local stub server
+that streams one word every --chunk-delay seconds.
+
+    python benchmarks/chat_streaming.py --words 300 --chunk-delay 0.01
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gemini_stub import start_stub
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.3, help="stub delay before the first chunk (s)")
+    parser.add_argument("--chunk-delay", type=float, default=0.01)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    reply = " ".join(f"word{i}" for i in range(args.words))
+    server, base_url = start_stub(reply_text=reply, latency=args.latency, chunk_delay=args.chunk_delay)
+    os.environ["GEMINI_BASE_URL"] = base_url
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+    import ai_helper
+
+    ai_helper.get_gemini_client()
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        stream = ai_helper.medical_chat_response_stream("I have a fever", "English", "Doctor")
+        first = None
+        for _chunk in stream:
+            if first is None:
+                first = time.perf_counter() - start
+        total = time.perf_counter() - start
+        assert stream.success and stream.text == reply, stream.error
+        print(f"stream   | first chunk {first * 1000:7.1f} ms | full reply {total * 1000:7.1f} ms")
+
+    start = time.perf_counter()
+    result = ai_helper.medical_chat_response("I have a fever", "English", "Doctor")
+    assert result["success"], result
+    print(f"blocking | first text  {(time.perf_counter() - start) * 1000:7.1f} ms (whole reply at once)")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Single-flight coalescing: --threads sessions issue the same request at the
+same moment (a popular city search, a common phrase, an identical symptom
+description), against a local stub server taking --latency seconds per call.
+
+    python benchmarks/coalescing.py --threads 20 --latency 0.5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gemini_stub import start_stub
+
+def burst(threads, call):
+    barrier = threading.Barrier(threads)
+    results = []
+
+    def session():
+        barrier.wait()
+        results.append(call())
+
+    pool = [threading.Thread(target=session) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    assert all(r.get("success") for r in results), results[:1]
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+    os.environ["HEALTH_DATA_DIR"] = tempfile.mkdtemp(prefix="arogya_flight_")
+    import ai_helper
+
+    calls = [
+        ("translate_text", "नमस्ते",
+         lambda: ai_helper.translate_text("Take after meals", "English", "हिंदी (Hindi)")),
+        ("find_nearby_hospitals", '[{"name": "City Hospital"}]',
+         lambda: ai_helper.find_nearby_hospitals("Varanasi", "Cardiology")),
+        ("analyze_symptoms", '{"severity_level": "Low", "urgent_care_needed": false}',
+         lambda: ai_helper.analyze_symptoms("mild headache", "English"))
+    ]
+    for name, reply, call in calls:
+        server, base_url = start_stub(reply_text=reply, latency=args.latency)
+        ai_helper.GEMINI_BASE_URL = base_url
+        ai_helper.reset_gemini_client()
+        ai_helper.get_gemini_client()
+        wall = burst(args.threads, call)
+        print(f"{name:>21} | {args.threads} concurrent calls -> {server.requests} upstream | {wall:.2f}s")
+        server.shutdown()
+    print(ai_helper.get_coalescing_stats())
+
+if __name__ == "__main__":
+    main()
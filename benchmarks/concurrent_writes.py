@@ -0,0 +1,67 @@
+"""
+Stress test for cross-process writes: N processes append appointments and
+create users in parallel against a scratch data directory, then we check
+that every record landed exactly once with a unique id.
+
+    python benchmarks/concurrent_writes.py --processes 8 --records 200
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def worker(worker_id, records):
+    import auth_manager
+    import data_manager
+
+    for i in range(records):
+        data_manager.add_appointment(f"Patient {worker_id}-{i}", "Dr. Bench", "2026-01-01", "10:00", "English")
+    for i in range(max(1, records // 10)):
+        auth_manager.create_user(f"User {worker_id}-{i}", f"user{worker_id}-{i}@example.com", "secret", "Patient")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--records", type=int, default=200)
+    parser.add_argument("--backend", default="journal", choices=["json", "journal", "sqlite"])
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="arogya_bench_")
+    os.environ["HEALTH_DATA_DIR"] = data_dir
+    os.environ["STORAGE_BACKEND"] = args.backend
+
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=worker, args=(n, args.records)) for n in range(args.processes)]
+    start = time.perf_counter()
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+    elapsed = time.perf_counter() - start
+
+    import auth_manager
+    import data_manager
+
+    appointments = data_manager.get_appointments()
+    users = auth_manager.load_users()
+    expected_appointments = args.processes * args.records
+    expected_users = args.processes * max(1, args.records // 10)
+    appointment_ids = {a["id"] for a in appointments}
+    user_ids = {u["id"] for u in users}
+
+    print(f"backend={args.backend} processes={args.processes} data_dir={data_dir}")
+    print(f"appointments: {len(appointments)}/{expected_appointments} stored, {len(appointment_ids)} unique ids")
+    print(f"users:        {len(users)}/{expected_users} stored, {len(user_ids)} unique ids")
+    print(f"elapsed: {elapsed:.2f}s ({expected_appointments / elapsed:.0f} appointment writes/s)")
+
+    ok = (len(appointments) == len(appointment_ids) == expected_appointments
+          and len(users) == len(user_ids) == expected_users)
+    print("OK: no lost or duplicated records" if ok else "FAILED: records were lost or duplicated")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Provider brownout against ai_helper's retry policy, using a fake Gemini
+client installed with ai_helper.set_gemini_client. The fake fails every
+call with 503 UNAVAILABLE for --outage seconds, then recovers. --threads
+sessions keep calling medical_chat_response for --seconds.
+
+Compares the shared policy (jittered backoff, retry budget, per-model
+circuit breaker) with the old fixed 2 s / 4 s sleeps and no breaker.
+
+    python benchmarks/fault_injection.py --threads 16 --outage 15 --seconds 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from google.genai import errors, types
+
+class FakeModels:
+    def __init__(self, fault, latency):
+        self.fault = fault
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.reply = "ok"
+        self.attempts = 0
+        self.failed_attempts = 0
+
+    def generate_content(self, model, contents, config=None):
+        """`latency` may be a number or {model: seconds}; `reply` a string or reply(model, contents, config)."""
+        with self.lock:
+            self.attempts += 1
+        time.sleep(self.latency.get(model, 0) if isinstance(self.latency, dict) else self.latency)
+        error = self.fault(model)
+        if error is not None:
+            with self.lock:
+                self.failed_attempts += 1
+            raise error
+        text = self.reply(model, contents, config) if callable(self.reply) else self.reply
+        system_instruction = getattr(config, "system_instruction", None) or ""
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=(len(str(contents)) + len(str(system_instruction))) // 4,
+                candidates_token_count=len(text) // 4
+            )
+        )
+
+    def generate_content_stream(self, model, contents, config=None):
+        yield self.generate_content(model, contents, config)
+
+class FakeClient:
+    """Stands in for genai.Client; `fault(model)` returns an exception to raise, or None."""
+
+    def __init__(self, fault, latency=0.05):
+        self.models = FakeModels(fault, latency)
+
+def fixed_delay_policy():
+    import resilience
+
+    class FixedDelayPolicy(resilience.RetryPolicy):
+        """The old call_gemini_with_retry: 3 attempts, sleep 2 s then 4 s, no budget or breaker."""
+
+        def before_attempt(self, model, attempt):
+            pass
+
+        def on_success(self, model):
+            pass
+
+        def on_failure(self, model, e, attempt, previous_delay, retry=True):
+            if not retry or not resilience.is_transient_error(e) or attempt >= self.max_attempts - 1:
+                return None
+            return 2.0 * (attempt + 1)
+
+    return FixedDelayPolicy()
+
+def outage_until(deadline):
+    def fault(model):
+        if time.monotonic() < deadline:
+            return errors.ServerError(503, {"error": {"code": 503, "message": "The model is overloaded.",
+                                                      "status": "UNAVAILABLE"}})
+        return None
+    return fault
+
+def run(label, policy, threads, outage, seconds):
+    import ai_helper
+
+    ai_helper.retry_policy = policy
+    start = time.monotonic()
+    recovered_at = start + outage
+    client = FakeClient(outage_until(recovered_at))
+    ai_helper.set_gemini_client(client)
+
+    lock = threading.Lock()
+    failed, succeeded = [], []
+    first_success_after_recovery = []
+    sleeping = [0, 0]
+    real_sleep = policy.sleep
+
+    def counted_sleep(delay):
+        with lock:
+            sleeping[0] += 1
+            sleeping[1] = max(sleeping[1], sleeping[0])
+        try:
+            real_sleep(delay)
+        finally:
+            with lock:
+                sleeping[0] -= 1
+    policy.sleep = counted_sleep
+
+    def session():
+        while time.monotonic() - start < seconds:
+            t0 = time.monotonic()
+            result = ai_helper.medical_chat_response("I have a fever", "English", "Patient")
+            elapsed = time.monotonic() - t0
+            with lock:
+                if result.get("success"):
+                    succeeded.append(elapsed)
+                    if not first_success_after_recovery:
+                        first_success_after_recovery.append(time.monotonic() - recovered_at)
+                else:
+                    failed.append(elapsed)
+            if not result.get("success"):
+                time.sleep(0.2)
+
+    pool = [threading.Thread(target=session) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    stats = policy.stats()
+    print(f"{label:>9} | calls to provider during outage {client.models.failed_attempts:5d} | failed calls {len(failed):4d} "
+          f"(avg {statistics.mean(failed) if failed else 0:5.2f}s to answer) | ok {len(succeeded):5d} "
+          f"| max threads sleeping {sleeping[1]:3d} | fail-fast {stats['rejected']:4d} "
+          f"| first success {first_success_after_recovery[0] if first_success_after_recovery else float('nan'):5.2f}s after recovery")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--outage", type=float, default=15)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--reset", type=float, default=2.0, help="circuit breaker reset timeout (s)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+    import resilience
+
+    legacy = fixed_delay_policy()
+    shared = resilience.RetryPolicy(reset_timeout=args.reset)
+
+    run("fixed", legacy, args.threads, args.outage, args.seconds)
+    run("resilient", shared, args.threads, args.outage, args.seconds)
+
+if __name__ == "__main__":
+    main()
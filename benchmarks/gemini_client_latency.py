@@ -0,0 +1,58 @@
+"""
+Per-call latency of ai_helper with the shared Gemini client versus building
+a cold client for every call (the old behaviour), against a local stub server.
+
+    python benchmarks/gemini_client_latency.py --calls 200 --connect-delay 0.02
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gemini_stub import start_stub
+
+def run(label, calls, cold):
+    import ai_helper
+
+    ai_helper.reset_gemini_client()
+    ai_helper.reset_latency_stats()
+    start = time.perf_counter()
+    for _ in range(calls):
+        if cold:
+            ai_helper.reset_gemini_client()
+        result = ai_helper.medical_chat_response("I have a headache", "English", "Patient")
+        assert result["success"], result
+    wall = time.perf_counter() - start
+
+    stats = ai_helper.get_latency_stats()
+    setup = stats["client_setup"]
+    call = stats["medical_chat_response"]
+    per_call = (setup["total_seconds"] + call["total_seconds"]) / calls
+    print(f"{label:>7} | {calls / wall:7.1f} calls/s | setup {setup['calls']:4d}x avg {setup['avg_seconds'] * 1000:6.2f} ms "
+          f"| request avg {call['avg_seconds'] * 1000:6.2f} ms | total per call {per_call * 1000:6.2f} ms")
+    return per_call
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub server time per request (s)")
+    parser.add_argument("--connect-delay", type=float, default=0.02, help="stub cost per new connection (s)")
+    args = parser.parse_args()
+
+    server, base_url = start_stub(latency=args.latency, connect_delay=args.connect_delay)
+    os.environ["GEMINI_BASE_URL"] = base_url
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+
+    cold = run("cold", args.calls, cold=True)
+    connections = server.connections
+    shared = run("shared", args.calls, cold=False)
+    print(f"connections opened: cold {connections}, shared {server.connections - connections}")
+    print(f"saved per call: {(cold - shared) * 1000:.2f} ms ({cold / shared:.1f}x)")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Minimal local stand-in for the Gemini REST API, for benchmarks.
+Answers generateContent with a fixed text reply, and streamGenerateContent
+with the same reply as one SSE event per word. --connect-delay is paid once
+per new TCP connection (a stand-in for the TLS handshake to the real API),
+--latency on every request (before the first chunk when streaming) and
+--chunk-delay between streamed chunks. --overloaded answers the first N
+requests with 503 UNAVAILABLE; --drop-stream-after cuts every stream off
+after that many chunks. POST /v1beta/cachedContents stores a system
+instruction as an explicit context cache; requests that reference it are
+billed its tokens as cachedContentTokenCount, and --input-token-delay is
+paid per input token that was not cached (a stand-in for prefill time).
+Resumable Files API uploads are accepted and counted in `server.uploads`.
+
+    python benchmarks/gemini_stub.py --port 8765
+    GEMINI_BASE_URL=http://127.0.0.1:8765 GEMINI_API_KEY=stub streamlit run app.py
+"""
+import argparse
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def response_json(text, prompt_tokens=10, cached_tokens=0):
+    usage = {"promptTokenCount": prompt_tokens, "candidatesTokenCount": 5, "totalTokenCount": prompt_tokens + 5}
+    if cached_tokens:
+        usage["cachedContentTokenCount"] = cached_tokens
+    return {
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}],
+        "usageMetadata": usage
+    }
+
+def text_tokens(content):
+    """~4 characters per token over every text part of a Content (or list of them)."""
+    if isinstance(content, list):
+        return sum(text_tokens(item) for item in content)
+    if not isinstance(content, dict):
+        return 0
+    return sum(len(part.get("text", "")) // 4 for part in content.get("parts", []))
+
+def make_handler(reply_text, latency, connect_delay, chunk_delay=0.0, drop_stream_after=None,
+                 input_token_delay=0.0):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            time.sleep(connect_delay)
+            with self.server.counter_lock:
+                self.server.connections += 1
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            if self.headers.get("X-Goog-Upload-Command"):
+                self.upload_file(length)
+                return
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if self.path.split("?")[0].endswith("/cachedContents"):
+                self.create_cached_content(body)
+                return
+
+            with self.server.counter_lock:
+                cached_tokens = self.server.cached_contents.get(body.get("cachedContent"), 0)
+                self.server.requests += 1
+                overloaded = self.server.overloaded > 0
+                if overloaded:
+                    self.server.overloaded -= 1
+            uncached_tokens = text_tokens(body.get("contents")) + text_tokens(body.get("systemInstruction"))
+            prompt_tokens = uncached_tokens + cached_tokens
+            time.sleep(latency + input_token_delay * uncached_tokens)
+
+            if overloaded:
+                self.send_json(503, {"error": {"code": 503, "message": "The model is overloaded.",
+                                               "status": "UNAVAILABLE"}})
+                return
+            words = reply_text.split(" ")
+            if ":streamGenerateContent" not in self.path:
+                # The whole reply still takes as long to generate as when streamed
+                time.sleep(chunk_delay * (len(words) - 1))
+                self.send_json(200, response_json(reply_text, prompt_tokens, cached_tokens))
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i, word in enumerate(words):
+                if drop_stream_after is not None and i == drop_stream_after:
+                    self.close_connection = True
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    return
+                if i:
+                    time.sleep(chunk_delay)
+                text = word if i == len(words) - 1 else word + " "
+                self.send_chunk(f"data: {json.dumps(response_json(text, prompt_tokens, cached_tokens))}\r\n\r\n".encode())
+            self.send_chunk(b"")
+
+        def upload_file(self, length):
+            """Resumable Files API upload: "start", then "upload" chunks, the last one with "finalize"."""
+            command = self.headers["X-Goog-Upload-Command"]
+            host = self.headers.get("Host")
+            if command == "start":
+                metadata = json.loads(self.rfile.read(length) or b"{}").get("file", {})
+                with self.server.counter_lock:
+                    upload_id = len(self.server.uploads) + 1
+                    mime_type = metadata.get("mimeType") or self.headers.get("X-Goog-Upload-Header-Content-Type")
+                    self.server.uploads[upload_id] = {"mimeType": mime_type, "received": 0}
+                self.send_response(200)
+                self.send_header("X-Goog-Upload-URL", f"http://{host}/upload/v1beta/files?upload_id={upload_id}")
+                self.send_header("X-Goog-Upload-Status", "active")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            upload_id = int(self.path.split("upload_id=")[1])
+            remaining = length
+            while remaining:
+                remaining -= len(self.rfile.read(min(remaining, 1 << 20)))
+            with self.server.counter_lock:
+                upload = self.server.uploads[upload_id]
+                upload["received"] += length
+                upload["chunks"] = upload.get("chunks", 0) + 1
+            if "finalize" not in command:
+                self.send_response(200)
+                self.send_header("X-Goog-Upload-Status", "active")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            file = {"name": f"files/{upload_id}", "uri": f"http://{host}/v1beta/files/{upload_id}",
+                    "mimeType": upload["mimeType"], "sizeBytes": str(upload["received"]), "state": "ACTIVE"}
+            body = json.dumps({"file": file}).encode()
+            self.send_response(200)
+            self.send_header("X-Goog-Upload-Status", "final")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_DELETE(self):
+            with self.server.counter_lock:
+                self.server.deleted_files += 1
+            self.send_json(200, {})
+
+        def create_cached_content(self, body):
+            with self.server.counter_lock:
+                name = f"cachedContents/{len(self.server.cached_contents) + 1}"
+                self.server.cached_contents[name] = text_tokens(body.get("systemInstruction"))
+            expire = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + 3600))
+            self.send_json(200, {"name": name, "model": body.get("model"), "expireTime": expire})
+
+    return StubHandler
+
+def start_stub(port=0, reply_text="ok", latency=0.0, connect_delay=0.0, chunk_delay=0.0,
+               overloaded=0, drop_stream_after=None, input_token_delay=0.0):
+    """Serve on a background thread; returns (server, base_url)."""
+    handler = make_handler(reply_text, latency, connect_delay, chunk_delay, drop_stream_after, input_token_delay)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.counter_lock = threading.Lock()
+    server.connections = 0
+    server.requests = 0
+    server.overloaded = overloaded
+    server.cached_contents = {}
+    server.uploads = {}
+    server.deleted_files = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--reply", default="ok")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--connect-delay", type=float, default=0.0)
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    parser.add_argument("--overloaded", type=int, default=0)
+    parser.add_argument("--drop-stream-after", type=int, default=None)
+    parser.add_argument("--input-token-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, base_url = start_stub(args.port, args.reply, args.latency, args.connect_delay, args.chunk_delay,
+                                  args.overloaded, args.drop_stream_after, args.input_token_delay)
+    print(f"Gemini stub listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
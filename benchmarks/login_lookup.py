@@ -0,0 +1,85 @@
+"""
+Login lookup latency with the persisted email index versus the old linear
+scan over users.json, at several user counts. Each size runs in a fresh
+process against a scratch data directory.
+
+    python benchmarks/login_lookup.py --sizes 10000,100000,1000000
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def generate_users(path, count):
+    import auth_manager
+    password_hash, salt = auth_manager.hash_password("secret", "benchsalt")
+    with open(path, 'w') as f:
+        f.write("[")
+        for i in range(count):
+            user = {
+                "id": i + 1, "name": f"User {i}", "email": f"user{i}@example.com",
+                "password_hash": password_hash, "salt": salt, "role": "Patient",
+                "language": "English", "phone": "", "created_at": "2026-01-01T00:00:00", "last_login": None
+            }
+            f.write(("," if i else "") + json.dumps(user))
+        f.write("]")
+
+def linear_lookup(users, email):
+    email_lower = email.lower().strip()
+    for u in users:
+        if u['email'].lower() == email_lower:
+            return u
+    return None
+
+def run_size(count, lookups):
+    import auth_manager
+
+    generate_users(auth_manager.USERS_FILE, count)
+    emails = [f"user{random.randrange(count)}@example.com" for _ in range(lookups)]
+
+    start = time.perf_counter()
+    auth_manager.find_user_by_email(emails[0])
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for email in emails:
+        user = auth_manager.find_user_by_email(email)
+        auth_manager.verify_password("secret", user['password_hash'], user['salt'])
+    indexed = (time.perf_counter() - start) / lookups
+
+    users = auth_manager.load_users()
+    scan_lookups = emails[:min(lookups, 100)]
+    start = time.perf_counter()
+    for email in scan_lookups:
+        user = linear_lookup(users, email)
+        auth_manager.verify_password("secret", user['password_hash'], user['salt'])
+    scanned = (time.perf_counter() - start) / len(scan_lookups)
+
+    print(f"{count:>9} users | first login (parse + index) {cold * 1000:9.1f} ms "
+          f"| indexed {indexed * 1e6:8.1f} us | linear scan {scanned * 1e6:10.1f} us")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.size:
+        run_size(args.size, args.lookups)
+        return
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        env = dict(os.environ, HEALTH_DATA_DIR=tempfile.mkdtemp(prefix="arogya_login_"))
+        subprocess.run([sys.executable, __file__, "--size", str(size), "--lookups", str(args.lookups)],
+                       env=env, check=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Login throughput and latency under concurrency for each password KDF.
+Logins run on T threads (like concurrent Streamlit sessions); KDF work is
+capped by auth_manager's bounded pool (KDF_WORKERS).
+
+    python benchmarks/login_throughput.py --threads 16 --seconds 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def run(threads, seconds):
+    import auth_manager
+
+    auth_manager.create_user("Bench", "bench@example.com", "secret", "Patient")
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            result = auth_manager.authenticate_user("bench@example.com", "secret")
+            elapsed = time.perf_counter() - start
+            assert result["success"], result
+            with lock:
+                latencies.append(elapsed)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{auth_manager.PASSWORD_KDF:>14} | workers={auth_manager.KDF_WORKERS} threads={threads} "
+          f"| {len(latencies) / wall:7.1f} logins/s | p50 {statistics.median(latencies) * 1000:7.1f} ms "
+          f"| p95 {p95 * 1000:7.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--kdfs", default="scrypt,pbkdf2_sha256")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run(args.threads, args.seconds)
+        return
+
+    for kdf in args.kdfs.split(","):
+        env = dict(os.environ, PASSWORD_KDF=kdf, HEALTH_DATA_DIR=tempfile.mkdtemp(prefix="arogya_kdf_"))
+        subprocess.run([sys.executable, __file__, "--child", "--threads", str(args.threads),
+                        "--seconds", str(args.seconds)], env=env, check=True)
+
+if __name__ == "__main__":
+    main()
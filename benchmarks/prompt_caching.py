@@ -0,0 +1,73 @@
+"""
+Input tokens and latency with the static system prompts stored as explicit
+context caches versus sent inline on every call (CONTEXT_CACHING=0), for
+analyze_symptoms and medical_chat_response. Runs against the local stub,
+which bills cached tokens separately and charges --input-token-delay per
+uncached input token. The real templates are smaller than the provider's
+minimum cacheable size, so the benchmark lowers that minimum; with the
+defaults they are sent inline.
+
+    python benchmarks/prompt_caching.py --requests 50 --input-token-delay 0.0005
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gemini_stub import start_stub
+
+REPORT = json.dumps({
+    "symptoms_summary": "Mild headache.",
+    "possible_conditions": ["Tension headache"],
+    "severity_level": "Low",
+    "recommendations": ["Rest"],
+    "urgent_care_needed": False,
+    "disclaimer": "This is not a medical diagnosis."
+})
+
+HEALTH_CONTEXT = "Allergies: Penicillin\nChronic conditions: Type 2 diabetes\nMedications: Metformin 500mg"
+
+def run(ai_helper, label, enabled, requests):
+    ai_helper.context_cache.enabled = enabled
+    ai_helper.reset_latency_stats()
+    start = time.perf_counter()
+    for i in range(requests):
+        result = ai_helper._analyze_symptoms(f"headache for {i} hours", "English", HEALTH_CONTEXT, "Doctor")
+        assert result["success"], result
+        result = ai_helper.medical_chat_response(f"question {i} about metformin", "English", "Patient",
+                                                 HEALTH_CONTEXT, "Medium")
+        assert result["success"], result
+    elapsed = time.perf_counter() - start
+
+    tokens = ai_helper.get_prompt_cache_stats()["tokens"]
+    prompt = sum(stats["prompt_tokens"] for stats in tokens.values())
+    cached = sum(stats["cached_tokens"] for stats in tokens.values())
+    print(f"{label:8} | {elapsed / (2 * requests) * 1000:6.1f} ms/call | input tokens {prompt:7d} "
+          f"| served from cache {cached:7d} | billed uncached {prompt - cached:7d}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--input-token-delay", type=float, default=0.0005, help="stub prefill seconds per uncached token")
+    args = parser.parse_args()
+
+    server, base_url = start_stub(reply_text=REPORT, latency=args.latency, input_token_delay=args.input_token_delay)
+    os.environ["GEMINI_BASE_URL"] = base_url
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+    import ai_helper
+
+    ai_helper.rate_limit.limits = {}
+    ai_helper.context_cache.min_tokens = {}
+    run(ai_helper, "inline", False, args.requests)
+    run(ai_helper, "cached", True, args.requests)
+    print(f"context caches: {ai_helper.context_cache.stats()}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Client-side rate limiting against a fake provider that enforces a quota and
+answers 429 RESOURCE_EXHAUSTED above it (via ai_helper.set_gemini_client).
+
+Single process: --threads sessions split between the urgent lane (where
+symptom analysis runs) and the hospital lookup lane, all on one model;
+reports 429s and per-lane latency.
+Shared: --processes processes coordinate through RATE_LIMIT_SHARED buckets.
+
+    python benchmarks/rate_limits.py --rpm 120 --threads 24 --seconds 10
+    python benchmarks/rate_limits.py --rpm 120 --processes 4 --seconds 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from google.genai import errors
+from fault_injection import FakeClient
+
+def provider_quota(rpm):
+    """
+    Fault for FakeClient: a per-model, per-minute quota (a bucket of rpm
+    requests refilled at rpm/60 per second), answering 429 when it is empty.
+    """
+    buckets = {}
+    lock = threading.Lock()
+
+    def fault(model):
+        with lock:
+            now = time.monotonic()
+            tokens, updated = buckets.get(model, (float(rpm), now))
+            tokens = min(rpm, tokens + (now - updated) * rpm / 60.0)
+            if tokens < 1:
+                buckets[model] = (tokens, now)
+                return errors.ClientError(429, {"error": {"code": 429, "message": "Quota exceeded",
+                                                          "status": "RESOURCE_EXHAUSTED"}})
+            buckets[model] = (tokens - 1, now)
+        return None
+    return fault
+
+def sessions(threads, seconds):
+    """
+    Half the threads make urgent calls, half hospital lookups, all on
+    gemini-2.5-flash so they compete for the same quota.
+    """
+    import ai_helper
+    import rate_limiter
+
+    lock = threading.Lock()
+    lanes = {"urgent": [], "lookup": []}
+    failures = {"urgent": 0, "lookup": 0}
+    start = time.monotonic()
+
+    def session(lane_name):
+        priority = rate_limiter.PRIORITY_URGENT if lane_name == "urgent" else rate_limiter.PRIORITY_LOOKUP
+        while time.monotonic() - start < seconds:
+            t0 = time.monotonic()
+            with rate_limiter.lane(priority):
+                result = ai_helper.fetch_hospitals("Mumbai", "Cardiology")
+            with lock:
+                if result.get("success"):
+                    lanes[lane_name].append(time.monotonic() - t0)
+                else:
+                    failures[lane_name] += 1
+            if not result.get("success"):
+                time.sleep(0.2)
+
+    pool = [threading.Thread(target=session, args=(("urgent", "lookup")[i % 2],)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return lanes, failures
+
+def single_process(rpm, threads, seconds, limited):
+    import ai_helper
+    import rate_limiter
+
+    ai_helper.rate_limit = rate_limiter.RateLimiter(
+        {model: {"rpm": rpm, "tpm": 10 ** 9} for model in ("gemini-2.5-flash", "gemini-2.5-pro")} if limited else {},
+        max_wait=ai_helper.RATE_LIMIT_MAX_WAIT
+    )
+    client = FakeClient(provider_quota(rpm), latency=0.02)
+    client.models.reply = '[{"name": "City Hospital"}]'
+    ai_helper.set_gemini_client(client)
+    ai_helper.retry_policy = ai_helper.resilience.RetryPolicy(base_delay=0.05, max_delay=0.5)
+
+    lanes, failures = sessions(threads, seconds)
+    label = "limited" if limited else "unlimited"
+    rejected = client.models.failed_attempts
+    for lane_name, latencies in lanes.items():
+        avg = statistics.mean(latencies) if latencies else float("nan")
+        print(f"{label:>9} | {lane_name:>6} lane | ok {len(latencies):4d} | failed {failures[lane_name]:4d} "
+              f"| avg latency {avg * 1000:7.1f} ms")
+    print(f"{label:>9} | provider 429s: {rejected}")
+
+def child(rpm, seconds, result_file):
+    import ai_helper
+
+    client = FakeClient(lambda model: None, latency=0.0)
+    client.models.reply = '[{"name": "City Hospital"}]'
+    ai_helper.set_gemini_client(client)
+    ai_helper.rate_limit.limits = {"gemini-2.5-flash": {"rpm": rpm, "tpm": 10 ** 9}}
+    sessions(4, seconds)
+    with open(result_file, "w") as f:
+        json.dump(client.models.attempts, f)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rpm", type=int, default=120)
+    parser.add_argument("--threads", type=int, default=24)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--processes", type=int, default=0)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+
+    if args.child:
+        child(args.rpm, args.seconds, args.child)
+        return
+
+    if not args.processes:
+        os.environ["HEALTH_DATA_DIR"] = tempfile.mkdtemp(prefix="arogya_rate_")
+        single_process(args.rpm, args.threads, args.seconds, limited=False)
+        single_process(args.rpm, args.threads, args.seconds, limited=True)
+        return
+
+    data_dir = tempfile.mkdtemp(prefix="arogya_rate_")
+    env = dict(os.environ, HEALTH_DATA_DIR=data_dir, RATE_LIMIT_SHARED="1")
+    results = [os.path.join(data_dir, f"calls_{i}.json") for i in range(args.processes)]
+    procs = [subprocess.Popen([sys.executable, __file__, "--rpm", str(args.rpm), "--seconds", str(args.seconds),
+                               "--child", result], env=env) for result in results]
+    start = time.monotonic()
+    for p in procs:
+        p.wait()
+    wall = time.monotonic() - start
+    total = 0
+    for result in results:
+        with open(result) as f:
+            total += json.load(f)
+    allowed = args.rpm + args.rpm * wall / 60
+    print(f"{args.processes} processes | flash calls {total} in {wall:.1f}s "
+          f"| shared quota allows at most {allowed:.0f} (full bucket + refill)")
+
+if __name__ == "__main__":
+    main()
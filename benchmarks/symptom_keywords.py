@@ -0,0 +1,65 @@
+"""
+Compare the single-pass Aho-Corasick symptom matcher with the old
+`keyword in text` loop over the full multilingual dictionary.
+
+    python benchmarks/symptom_keywords.py --texts 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_matcher import AhoCorasick, load_keyword_dictionary
+
+FILLER = [
+    "I have been feeling", "since yesterday", "and it gets worse at night", "मुझे", "है",
+    "after eating", "my child has", "for three days", "नमस्ते डॉक्टर", "please help",
+]
+
+def loop_match(keywords, text):
+    text_lower = text.lower()
+    return [keyword for keyword in keywords if keyword in text_lower]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=60, help="approximate words per symptom description")
+    parser.add_argument("--synthetic-keywords", type=int, default=0,
+                        help="pad the dictionary with N random keywords to simulate a larger vocabulary")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    keywords = list(dict.fromkeys(k.lower() for k in load_keyword_dictionary()))
+    for i in range(args.synthetic_keywords):
+        keywords.append("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(8)) + str(i))
+
+    texts = []
+    for _ in range(args.texts):
+        words = [rng.choice(keywords) if rng.random() < 0.15 else rng.choice(FILLER) for _ in range(args.words)]
+        texts.append(" ".join(words))
+
+    start = time.perf_counter()
+    matcher = AhoCorasick(keywords)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    loop_results = [loop_match(keywords, t) for t in texts]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    automaton_results = [matcher.matching_keywords(t) for t in texts]
+    automaton_time = time.perf_counter() - start
+
+    assert [sorted(r) for r in loop_results] == [sorted(r) for r in automaton_results]
+
+    print(f"{len(keywords)} keywords, {len(texts)} texts of ~{args.words} words")
+    print(f"automaton build:  {build_time * 1000:.1f} ms (once per process)")
+    print(f"substring loop:   {loop_time / len(texts) * 1e6:.1f} us/text")
+    print(f"aho-corasick:     {automaton_time / len(texts) * 1e6:.1f} us/text")
+    print(f"speedup:          {loop_time / automaton_time:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+analyze_symptoms routing: flash first, escalating to pro for severe, urgent
+or malformed reports. Replays a symptom mix against a fake client (via
+ai_helper.set_gemini_client) with per-model latency, and compares the
+routed latency/cost with always using pro (SYMPTOM_ROUTING=0).
+
+    python benchmarks/symptom_routing.py --requests 200 --severe 0.2 --malformed 0.05
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fault_injection import FakeClient
+
+MILD = ["mild headache since morning", "runny nose and sneezing", "slight back pain after lifting", "dry skin on hands"]
+SEVERE = ["crushing chest pain spreading to left arm", "sudden weakness on one side of face", "high fever with stiff neck"]
+
+def report(severity, urgent):
+    return json.dumps({
+        "symptoms_summary": "Summary of the reported symptoms.",
+        "possible_conditions": ["Condition A", "Condition B"],
+        "severity_level": severity,
+        "recommendations": ["Rest", "Drink fluids", "Monitor symptoms"],
+        "urgent_care_needed": urgent,
+        "when_to_see_doctor": "If symptoms persist beyond 3 days.",
+        "allergy_warnings": [],
+        "condition_considerations": "",
+        "disclaimer": "This is not a medical diagnosis. Please consult a doctor for proper evaluation."
+    })
+
+def make_reply(rng, malformed):
+    def reply(model, contents, config=None):
+        severe = contents in SEVERE
+        if model == "gemini-2.5-flash" and rng.random() < malformed:
+            return report("Low", False)[:-40]
+        return report("High", True) if severe else report("Low", False)
+    return reply
+
+def run(label, requests, severe, malformed, routing, seed):
+    import ai_helper
+
+    rng = random.Random(seed)
+    client = FakeClient(lambda model: None, latency={"gemini-2.5-flash": 0.05, "gemini-2.5-pro": 0.2})
+    client.models.reply = make_reply(rng, malformed)
+    ai_helper.set_gemini_client(client)
+    ai_helper.rate_limit.limits = {}
+    ai_helper.SYMPTOM_ROUTING = routing
+    ai_helper._routing_stats.clear()
+
+    start = time.perf_counter()
+    for i in range(requests):
+        symptoms = rng.choice(SEVERE) if rng.random() < severe else rng.choice(MILD)
+        # Straight to the routing layer; single-flight coalescing is not under test here
+        result = ai_helper._analyze_symptoms(symptoms, "English", None, "Patient")
+        assert result["success"], result
+    wall = time.perf_counter() - start
+
+    stats = ai_helper.get_routing_stats()
+    cost = sum(route["cost_usd"] for route in stats.values())
+    print(f"{label:>8} | avg {wall / requests * 1000:6.1f} ms/request | est. cost ${cost:.4f} "
+          f"(${cost / requests * 1000:.3f} per 1k)")
+    for route, s in sorted(stats.items()):
+        print(f"{'':>8} | {route:>12}: {s['calls']:4d} calls, avg {s['avg_seconds'] * 1000:6.1f} ms, "
+              f"${s['avg_cost_usd'] * 1000:.3f} per 1k, reasons {s['reasons']}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--severe", type=float, default=0.2, help="share of severe symptom descriptions")
+    parser.add_argument("--malformed", type=float, default=0.05, help="share of malformed flash replies")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+
+    run("pro", args.requests, args.severe, args.malformed, False, args.seed)
+    run("routed", args.requests, args.severe, args.malformed, True, args.seed)
+
+if __name__ == "__main__":
+    main()
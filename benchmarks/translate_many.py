@@ -0,0 +1,92 @@
+"""
+One prescription into several languages: a generate_prescription_translation
+round trip per language (the old prescription page), the same calls run
+concurrently, and ai_helper.translate_many's single JSON call. The batch
+saves calls (requests-per-minute quota) and repeated input tokens; the
+concurrent calls still finish first, since one reply generates every
+translation in sequence. Uses a fake client whose calls take --latency plus
+--token-delay per output token; --drop makes the batch reply leave out a
+fraction of the languages, to exercise the per-language fallback.
+
+    python benchmarks/translate_many.py --languages 5 --rounds 10 --drop 0.1
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fault_injection import FakeClient
+
+PRESCRIPTION = """
+Medication: Amoxicillin 500mg
+Dosage: One capsule three times a day for 7 days
+Instructions: Take after food. Finish the full course even if you feel better.
+"""
+
+def make_reply(rng, drop, token_delay):
+    def reply(model, contents, config=None):
+        translation = f"[translated] {contents.strip()}"
+        schema = getattr(config, "response_schema", None)
+        if schema is None:
+            text = translation
+        else:
+            text = json.dumps({code: translation for code in schema.properties if rng.random() >= drop})
+        time.sleep(len(text) // 4 * token_delay)
+        return text
+    return reply
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--languages", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.3, help="fake per-call latency (s)")
+    parser.add_argument("--token-delay", type=float, default=0.002, help="fake seconds per output token")
+    parser.add_argument("--drop", type=float, default=0.1, help="fraction of languages missing from a batch reply")
+    args = parser.parse_args()
+
+    os.environ["HEALTH_DATA_DIR"] = tempfile.mkdtemp()
+    import ai_helper
+
+    client = FakeClient(lambda model: None, latency=args.latency)
+    client.models.reply = make_reply(random.Random(1), args.drop, args.token_delay)
+    ai_helper.set_gemini_client(client)
+    ai_helper.rate_limit.limits = {}
+    targets = [l for l in ai_helper.SUPPORTED_LANGUAGES if l != "English"][:args.languages]
+
+    def sequential(text):
+        return {target: ai_helper.generate_prescription_translation(text, "English", target) for target in targets}
+
+    def concurrent(text):
+        return ai_helper.run_concurrently(*[
+            ai_helper.generate_prescription_translation_async(text, "English", target) for target in targets
+        ])
+
+    def batched(text):
+        return ai_helper.translate_many(text, "English", targets, prescription=True)
+
+    for label, translate in [("sequential", sequential), ("concurrent", concurrent), ("batched", batched)]:
+        ai_helper.translation_cache.clear()
+        ai_helper.reset_latency_stats()
+        calls = client.models.attempts
+        start = time.perf_counter()
+        for i in range(args.rounds):
+            # A new prescription each round, so every language misses the cache
+            results = translate(PRESCRIPTION + f"Refills: {i}\n")
+            results = results.values() if isinstance(results, dict) else results
+            assert all(result["success"] for result in results)
+        elapsed = time.perf_counter() - start
+        tokens = sum(stats["prompt_tokens"] for stats in ai_helper.get_prompt_cache_stats()["tokens"].values())
+        print(f"{label:10} | {elapsed / args.rounds * 1000:7.1f} ms per prescription | "
+              f"{(client.models.attempts - calls) / args.rounds:4.1f} model calls | "
+              f"{tokens / args.rounds:6.0f} input tokens per prescription")
+    print(f"translate_many: {ai_helper.get_translate_many_stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Translation cache hit rate and latency: a workload of repeated prescription
+instructions translated into every supported language, against a local stub
+server that takes --latency seconds per call (a flash round trip).
+
+    python benchmarks/translation_cache.py --requests 2000 --phrases 50 --latency 0.3
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gemini_stub import start_stub
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--phrases", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    server, base_url = start_stub(latency=args.latency)
+    os.environ["GEMINI_BASE_URL"] = base_url
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+    os.environ["HEALTH_DATA_DIR"] = tempfile.mkdtemp(prefix="arogya_translation_")
+    import ai_helper
+
+    rng = random.Random(args.seed)
+    phrases = [f"Take {i % 3 + 1} tablet(s) after meals twice daily for {i % 7 + 3} days" for i in range(args.phrases)]
+    targets = [lang for lang in ai_helper.SUPPORTED_LANGUAGES if lang != "English"]
+
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        # Skewed like real traffic: a few common instructions dominate
+        phrase = phrases[min(int(rng.expovariate(1 / 8)), len(phrases) - 1)]
+        if rng.random() < 0.2:
+            phrase = "  " + phrase.replace(" ", "  ") + " "
+        result = ai_helper.translate_text(phrase, "English", rng.choice(targets))
+        assert result["success"], result
+    wall = time.perf_counter() - start
+
+    stats = ai_helper.get_translation_cache_stats()
+    print(f"requests {args.requests} | model calls {server.requests} | hit rate {stats['hit_rate']:.1%} "
+          f"(memory {stats['memory_hits']}, disk {stats['disk_hits']}, misses {stats['misses']})")
+    print(f"wall {wall:.2f}s | avg {wall / args.requests * 1000:.1f} ms/request | "
+          f"uncached estimate {args.requests * args.latency:.1f}s")
+
+    # A fresh process only has the disk tier
+    ai_helper.translation_cache._memory.clear()
+    start = time.perf_counter()
+    ai_helper.translate_text(phrases[0], "English", targets[0])
+    print(f"disk-tier hit after memory reset: {(time.perf_counter() - start) * 1000:.2f} ms")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Bulk re-translation throughput of translation_jobs for one patient with
+--records prescriptions and health records, at several worker counts, plus
+a resumed run: the first run's translations start failing partway, its job
+is put back to "running" (as a crash would leave it), and a second run
+translates only what was not checkpointed. Uses a fake client with
+--latency per call and a throwaway data directory.
+
+    python benchmarks/translation_jobs.py --records 100 --workers 1,4,8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fault_injection import FakeClient
+
+class Interrupted(Exception):
+    pass
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=100, help="prescriptions and health records each")
+    parser.add_argument("--workers", default="1,4,8")
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    os.environ["HEALTH_DATA_DIR"] = tempfile.mkdtemp()
+    import ai_helper
+    import data_manager
+    import translation_jobs
+
+    client = FakeClient(lambda model: None, latency=args.latency)
+    client.models.reply = lambda model, contents, config=None: f"[translated] {contents.strip()}"
+    ai_helper.set_gemini_client(client)
+    ai_helper.rate_limit.limits = {}
+    for i in range(args.records):
+        data_manager.add_prescription("Ravi Kumar", "Dr. Rao", f"Medicine {i}", "Twice a day", "After food", "English")
+        data_manager.add_health_record("Ravi Kumar", "Symptom Check", f"Headache and fever, day {i}", "English")
+    languages = [l for l in ai_helper.SUPPORTED_LANGUAGES if l != "English"]
+
+    for round_number, workers in enumerate(int(n) for n in args.workers.split(",")):
+        # A new language each round, and no cache hits, so every record is translated again
+        ai_helper.translation_cache.clear()
+        job = translation_jobs.enqueue("Ravi Kumar", languages[round_number % len(languages)])
+        calls = client.models.attempts
+        start = time.perf_counter()
+        job = translation_jobs.run_job(job["id"], workers)
+        elapsed = time.perf_counter() - start
+        print(f"workers {workers:2d} | {job['total']} records in {elapsed:6.2f} s "
+              f"| {job['total'] / elapsed:6.1f} records/s | {client.models.attempts - calls} model calls")
+
+    # Resume: stop the runner after a third of the records, then run again
+    ai_helper.translation_cache.clear()
+    job = translation_jobs.enqueue("Ravi Kumar", "English")
+    stop_after = 2 * args.records // 3
+    translate = translation_jobs.translate_record
+
+    def interrupting(collection, record, target_language):
+        if client.models.attempts >= stop_after:
+            raise Interrupted()
+        return translate(collection, record, target_language)
+
+    calls = client.models.attempts
+    stop_after += calls
+    translation_jobs.translate_record = interrupting
+    translation_jobs.run_job(job["id"], 4)
+    translation_jobs.translate_record = translate
+    first = client.models.attempts - calls
+    checkpointed = len(translation_jobs.load_job(job["id"])["done"])
+    translation_jobs.update_job(job["id"], status="running", failed={})
+    calls = client.models.attempts
+    job = translation_jobs.run_job(job["id"], 4)
+    print(f"resume     | interrupted after {first} calls with {checkpointed} records checkpointed; "
+          f"second run made {client.models.attempts - calls} calls, job {job['status']} "
+          f"{len(job['done'])}/{job['total']}")
+
+if __name__ == "__main__":
+    main()
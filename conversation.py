@@ -0,0 +1,122 @@
+"""
+Chat history for one AI Chat session. Keeps the transcript shown on the
+page (capped at `max_messages`), plus what is sent to the model: a running
+summary of older turns and a rolling window of recent ones within a token
+budget. When the window outgrows the budget its oldest turns are folded
+into the summary with one model call, so summarization runs about once per
+half-budget of new text rather than on every turn. That call can run in the
+background (start_compaction); its result is applied before the next
+context().
+"""
+from collections import deque
+import rate_limiter
+
+class Conversation:
+    def __init__(self, budget_tokens=2000, max_messages=200, summary_max_chars=2000):
+        self.budget_tokens = budget_tokens
+        self.summary_max_chars = summary_max_chars
+        self.messages = deque(maxlen=max_messages)
+        self.summary = ""
+        # Trailing messages not yet folded into the summary
+        self._unsummarized = 0
+        # (message count, future) of a summary being written in the background
+        self._compaction = None
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __len__(self):
+        return len(self.messages)
+
+    def add(self, role, content):
+        self.messages.append({"role": role, "content": content})
+        # Messages pushed out of the transcript are gone, summarized or not
+        self._unsummarized = min(self._unsummarized + 1, len(self.messages))
+
+    def window(self):
+        return list(self.messages)[len(self.messages) - self._unsummarized:]
+
+    def window_tokens(self):
+        return sum(rate_limiter.estimate_tokens(message["content"]) for message in self.window())
+
+    def pending_summary(self):
+        """Oldest window messages to fold into the summary: none until the window is over budget,
+        then enough to bring it down to half the budget (always keeping the latest exchange)."""
+        window = self.window()
+        tokens = sum(rate_limiter.estimate_tokens(message["content"]) for message in window)
+        if tokens <= self.budget_tokens:
+            return []
+        count = 0
+        while count < len(window) - 2 and tokens > self.budget_tokens // 2:
+            tokens -= rate_limiter.estimate_tokens(window[count]["content"])
+            count += 1
+        return window[:count]
+
+    def compact(self, summarize):
+        """
+        summarize(summary, messages) returns the previous summary updated with
+        those messages, or None on failure (the messages then stay in the
+        window and are tried again after the next turn). Returns whether the
+        summary changed.
+        """
+        self.finish_compaction()
+        pending = self.pending_summary()
+        if not pending:
+            return False
+        return self._apply_summary(len(pending), summarize(self.summary, pending))
+
+    def start_compaction(self, submit, summarize):
+        """
+        Like compact(), but runs summarize through submit(fn, *args) (e.g. a
+        thread pool's submit) and returns straight away; finish_compaction()
+        applies the result. Returns whether a summary was started.
+        """
+        if self._compaction is not None:
+            return False
+        pending = self.pending_summary()
+        if not pending:
+            return False
+        self._compaction = (len(pending), submit(summarize, self.summary, pending))
+        return True
+
+    def finish_compaction(self):
+        """Wait for a started compaction and apply it; returns whether the summary changed."""
+        if self._compaction is None:
+            return False
+        count, future = self._compaction
+        self._compaction = None
+        return self._apply_summary(count, future.result())
+
+    def _apply_summary(self, count, summary):
+        if not summary:
+            return False
+        self.summary = summary[:self.summary_max_chars]
+        # The summarized messages are still the oldest in the window; new ones were appended
+        self._unsummarized = max(self._unsummarized - count, 0)
+        return True
+
+    def context(self):
+        """
+        History to send before the next user message: the summary (if any) and
+        the newest window messages that fit in the budget. The hard limit keeps
+        requests bounded even while summarization is failing.
+        """
+        self.finish_compaction()
+        history = []
+        tokens = 0
+        for message in reversed(self.window()):
+            tokens += rate_limiter.estimate_tokens(message["content"])
+            if tokens > self.budget_tokens and history:
+                break
+            history.append(message)
+        history.reverse()
+        if self.summary:
+            history.insert(0, {"role": "summary", "content": self.summary})
+        return history
+
+    def clear(self):
+        self.messages.clear()
+        self.summary = ""
+        self._unsummarized = 0
+        # A summary still being written would describe the cleared messages
+        self._compaction = None
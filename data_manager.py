@@ -1,51 +1,57 @@
-import json
+import atexit
 import os
+import threading
 from datetime import datetime, timedelta
 import pandas as pd
+import keyword_matcher
+import storage
 
-DATA_DIR = "/tmp/health_data"
+DATA_DIR = os.environ.get("HEALTH_DATA_DIR", "/tmp/health_data")
+# "journal" appends each change to a JSON Lines journal, "json" rewrites the whole file,
+# "sqlite" keeps every collection in health_data.db with indexed lookup columns
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "journal")
 APPOINTMENTS_FILE = os.path.join(DATA_DIR, "appointments.json")
 PRESCRIPTIONS_FILE = os.path.join(DATA_DIR, "prescriptions.json")
 HEALTH_RECORDS_FILE = os.path.join(DATA_DIR, "health_records.json")
 REMINDERS_FILE = os.path.join(DATA_DIR, "reminders.json")
 
+_store = None
+_recovered_files = set()
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = storage.create_store(STORAGE_BACKEND, DATA_DIR)
+    return _store
+
+def recover_collection(filepath):
+    """Replay any journal left by a previous process into the snapshot, once per process."""
+    if filepath not in _recovered_files:
+        _recovered_files.add(filepath)
+        get_store().recover(filepath)
+
 def ensure_data_directory():
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
-    
-    if not os.path.exists(APPOINTMENTS_FILE):
-        with open(APPOINTMENTS_FILE, 'w') as f:
-            json.dump([], f)
-    
-    if not os.path.exists(PRESCRIPTIONS_FILE):
-        with open(PRESCRIPTIONS_FILE, 'w') as f:
-            json.dump([], f)
+    os.makedirs(DATA_DIR, exist_ok=True)
     
-    if not os.path.exists(HEALTH_RECORDS_FILE):
-        with open(HEALTH_RECORDS_FILE, 'w') as f:
-            json.dump([], f)
-    
-    if not os.path.exists(REMINDERS_FILE):
-        with open(REMINDERS_FILE, 'w') as f:
-            json.dump([], f)
+    for filepath in [APPOINTMENTS_FILE, PRESCRIPTIONS_FILE, HEALTH_RECORDS_FILE, REMINDERS_FILE]:
+        storage.ensure_json_file(filepath, [])
+        recover_collection(filepath)
 
 def load_json_file(filepath):
-    try:
-        with open(filepath, 'r') as f:
-            return json.load(f)
-    except:
-        return []
+    return get_store().load(filepath)
 
 def save_json_file(filepath, data):
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2)
+    get_store().replace(filepath, data)
+
+def get_cache_stats():
+    """Hit/miss counters for the in-process collection cache"""
+    return storage.cache.stats()
 
 def add_appointment(patient_name, doctor_name, date, time, language, notes=""):
     ensure_data_directory()
-    appointments = load_json_file(APPOINTMENTS_FILE)
     
     appointment = {
-        "id": len(appointments) + 1,
+        "id": get_store().next_id(APPOINTMENTS_FILE),
         "patient_name": patient_name,
         "doctor_name": doctor_name,
         "date": date,
@@ -56,48 +62,29 @@ def add_appointment(patient_name, doctor_name, date, time, language, notes=""):
         "created_at": datetime.now().isoformat()
     }
     
-    appointments.append(appointment)
-    save_json_file(APPOINTMENTS_FILE, appointments)
+    get_store().add(APPOINTMENTS_FILE, appointment)
     return appointment
 
 def get_appointments(filter_by=None):
     ensure_data_directory()
-    appointments = load_json_file(APPOINTMENTS_FILE)
-    
     if filter_by:
-        appointments = [apt for apt in appointments if 
-                       filter_by.lower() in apt.get('patient_name', '').lower() or
-                       filter_by.lower() in apt.get('doctor_name', '').lower()]
+        return get_store().search(APPOINTMENTS_FILE, filter_by, fields=('patient_name', 'doctor_name'))
     
-    return appointments
+    return load_json_file(APPOINTMENTS_FILE)
 
 def update_appointment(appointment_id, **kwargs):
     ensure_data_directory()
-    appointments = load_json_file(APPOINTMENTS_FILE)
-    
-    for apt in appointments:
-        if apt['id'] == appointment_id:
-            for key, value in kwargs.items():
-                if key in apt:
-                    apt[key] = value
-            save_json_file(APPOINTMENTS_FILE, appointments)
-            return apt
-    
-    return None
+    return get_store().update(APPOINTMENTS_FILE, appointment_id, kwargs)
 
 def delete_appointment(appointment_id):
     ensure_data_directory()
-    appointments = load_json_file(APPOINTMENTS_FILE)
-    appointments = [apt for apt in appointments if apt['id'] != appointment_id]
-    save_json_file(APPOINTMENTS_FILE, appointments)
-    return True
+    return get_store().delete(APPOINTMENTS_FILE, appointment_id)
 
 def add_prescription(patient_name, doctor_name, medication, dosage, instructions, language, translated_text=""):
     ensure_data_directory()
-    prescriptions = load_json_file(PRESCRIPTIONS_FILE)
     
     prescription = {
-        "id": len(prescriptions) + 1,
+        "id": get_store().next_id(PRESCRIPTIONS_FILE),
         "patient_name": patient_name,
         "doctor_name": doctor_name,
         "medication": medication,
@@ -109,97 +96,70 @@ def add_prescription(patient_name, doctor_name, medication, dosage, instructions
         "created_at": datetime.now().isoformat()
     }
     
-    prescriptions.append(prescription)
-    save_json_file(PRESCRIPTIONS_FILE, prescriptions)
+    get_store().add(PRESCRIPTIONS_FILE, prescription)
     return prescription
 
 def get_prescriptions(patient_name=None):
     ensure_data_directory()
-    prescriptions = load_json_file(PRESCRIPTIONS_FILE)
-    
     if patient_name:
-        prescriptions = [p for p in prescriptions if 
-                        patient_name.lower() in p.get('patient_name', '').lower()]
+        return get_store().search(PRESCRIPTIONS_FILE, patient_name)
     
-    return prescriptions
+    return load_json_file(PRESCRIPTIONS_FILE)
 
 def update_prescription(prescription_id, **kwargs):
     ensure_data_directory()
-    prescriptions = load_json_file(PRESCRIPTIONS_FILE)
-    
-    for rx in prescriptions:
-        if rx['id'] == prescription_id:
-            for key, value in kwargs.items():
-                if key in rx:
-                    rx[key] = value
-            save_json_file(PRESCRIPTIONS_FILE, prescriptions)
-            return rx
-    
-    return None
+    return get_store().update(PRESCRIPTIONS_FILE, prescription_id, kwargs)
 
 def delete_prescription(prescription_id):
     ensure_data_directory()
-    prescriptions = load_json_file(PRESCRIPTIONS_FILE)
-    prescriptions = [rx for rx in prescriptions if rx['id'] != prescription_id]
-    save_json_file(PRESCRIPTIONS_FILE, prescriptions)
-    return True
+    return get_store().delete(PRESCRIPTIONS_FILE, prescription_id)
 
 def add_health_record(patient_name, record_type, description, language, report_data=None):
     ensure_data_directory()
-    records = load_json_file(HEALTH_RECORDS_FILE)
     
     record = {
-        "id": len(records) + 1,
+        "id": get_store().next_id(HEALTH_RECORDS_FILE),
         "patient_name": patient_name,
         "record_type": record_type,
         "description": description,
         "language": language,
         "report_data": report_data or {},
+        "translated_text": "",
+        "translated_language": "",
         "date": datetime.now().strftime("%Y-%m-%d"),
         "created_at": datetime.now().isoformat()
     }
     
-    records.append(record)
-    save_json_file(HEALTH_RECORDS_FILE, records)
+    get_store().add(HEALTH_RECORDS_FILE, record)
     return record
 
 def get_health_records(patient_name=None):
     ensure_data_directory()
-    records = load_json_file(HEALTH_RECORDS_FILE)
-    
     if patient_name:
-        records = [r for r in records if 
-                  patient_name.lower() in r.get('patient_name', '').lower()]
+        return get_store().search(HEALTH_RECORDS_FILE, patient_name)
     
-    return records
+    return load_json_file(HEALTH_RECORDS_FILE)
 
 def update_health_record(record_id, **kwargs):
     ensure_data_directory()
-    records = load_json_file(HEALTH_RECORDS_FILE)
-    
-    for record in records:
-        if record['id'] == record_id:
-            for key, value in kwargs.items():
-                if key in record:
-                    record[key] = value
-            save_json_file(HEALTH_RECORDS_FILE, records)
-            return record
-    
-    return None
+    return get_store().update(HEALTH_RECORDS_FILE, record_id, kwargs)
+
+def set_health_record_translation(record_id, language, translated_text):
+    """Store a translation of the record's description (older records gain the fields)."""
+    ensure_data_directory()
+    return get_store().update(HEALTH_RECORDS_FILE, record_id,
+                              {"translated_text": translated_text, "translated_language": language},
+                              add_missing=True)
 
 def delete_health_record(record_id):
     ensure_data_directory()
-    records = load_json_file(HEALTH_RECORDS_FILE)
-    records = [r for r in records if r['id'] != record_id]
-    save_json_file(HEALTH_RECORDS_FILE, records)
-    return True
+    return get_store().delete(HEALTH_RECORDS_FILE, record_id)
 
 def add_reminder(patient_name, reminder_type, message, language, phone_number=""):
     ensure_data_directory()
-    reminders = load_json_file(REMINDERS_FILE)
     
     reminder = {
-        "id": len(reminders) + 1,
+        "id": get_store().next_id(REMINDERS_FILE),
         "patient_name": patient_name,
         "reminder_type": reminder_type,
         "message": message,
@@ -210,40 +170,23 @@ def add_reminder(patient_name, reminder_type, message, language, phone_number=""
         "scheduled_for": (datetime.now() + timedelta(days=1)).isoformat()
     }
     
-    reminders.append(reminder)
-    save_json_file(REMINDERS_FILE, reminders)
+    get_store().add(REMINDERS_FILE, reminder)
     return reminder
 
 def get_reminders(patient_name=None):
     ensure_data_directory()
-    reminders = load_json_file(REMINDERS_FILE)
-    
     if patient_name:
-        reminders = [r for r in reminders if 
-                    patient_name.lower() in r.get('patient_name', '').lower()]
+        return get_store().search(REMINDERS_FILE, patient_name)
     
-    return reminders
+    return load_json_file(REMINDERS_FILE)
 
 def update_reminder(reminder_id, **kwargs):
     ensure_data_directory()
-    reminders = load_json_file(REMINDERS_FILE)
-    
-    for reminder in reminders:
-        if reminder['id'] == reminder_id:
-            for key, value in kwargs.items():
-                if key in reminder:
-                    reminder[key] = value
-            save_json_file(REMINDERS_FILE, reminders)
-            return reminder
-    
-    return None
+    return get_store().update(REMINDERS_FILE, reminder_id, kwargs)
 
 def delete_reminder(reminder_id):
     ensure_data_directory()
-    reminders = load_json_file(REMINDERS_FILE)
-    reminders = [r for r in reminders if r['id'] != reminder_id]
-    save_json_file(REMINDERS_FILE, reminders)
-    return True
+    return get_store().delete(REMINDERS_FILE, reminder_id)
 
 def get_appointments_dataframe():
     appointments = get_appointments()
@@ -267,16 +210,14 @@ MEDICATIONS_FILE = os.path.join(DATA_DIR, "medications.json")
 
 def ensure_medications_file():
     ensure_data_directory()
-    if not os.path.exists(MEDICATIONS_FILE):
-        with open(MEDICATIONS_FILE, 'w') as f:
-            json.dump([], f)
+    storage.ensure_json_file(MEDICATIONS_FILE, [])
+    recover_collection(MEDICATIONS_FILE)
 
 def add_medication(patient_name, medication_name, dosage, frequency, start_date, end_date=None, notes=""):
     ensure_medications_file()
-    medications = load_json_file(MEDICATIONS_FILE)
     
     medication = {
-        "id": len(medications) + 1,
+        "id": get_store().next_id(MEDICATIONS_FILE),
         "patient_name": patient_name,
         "medication_name": medication_name,
         "dosage": dosage,
@@ -288,40 +229,23 @@ def add_medication(patient_name, medication_name, dosage, frequency, start_date,
         "created_at": datetime.now().isoformat()
     }
     
-    medications.append(medication)
-    save_json_file(MEDICATIONS_FILE, medications)
+    get_store().add(MEDICATIONS_FILE, medication)
     return medication
 
 def get_medications(patient_name=None):
     ensure_medications_file()
-    medications = load_json_file(MEDICATIONS_FILE)
-    
     if patient_name:
-        medications = [m for m in medications if 
-                      patient_name.lower() in m.get('patient_name', '').lower()]
+        return get_store().search(MEDICATIONS_FILE, patient_name)
     
-    return medications
+    return load_json_file(MEDICATIONS_FILE)
 
 def update_medication(medication_id, **kwargs):
     ensure_medications_file()
-    medications = load_json_file(MEDICATIONS_FILE)
-    
-    for med in medications:
-        if med['id'] == medication_id:
-            for key, value in kwargs.items():
-                if key in med:
-                    med[key] = value
-            save_json_file(MEDICATIONS_FILE, medications)
-            return med
-    
-    return None
+    return get_store().update(MEDICATIONS_FILE, medication_id, kwargs)
 
 def delete_medication(medication_id):
     ensure_medications_file()
-    medications = load_json_file(MEDICATIONS_FILE)
-    medications = [m for m in medications if m['id'] != medication_id]
-    save_json_file(MEDICATIONS_FILE, medications)
-    return True
+    return get_store().delete(MEDICATIONS_FILE, medication_id)
 
 def get_medications_dataframe(patient_name=None):
     medications = get_medications(patient_name)
@@ -333,64 +257,54 @@ SAVED_HOSPITALS_FILE = os.path.join(DATA_DIR, "saved_hospitals.json")
 
 def ensure_saved_hospitals_file():
     ensure_data_directory()
-    if not os.path.exists(SAVED_HOSPITALS_FILE):
-        with open(SAVED_HOSPITALS_FILE, 'w') as f:
-            json.dump([], f)
+    storage.ensure_json_file(SAVED_HOSPITALS_FILE, [])
+    recover_collection(SAVED_HOSPITALS_FILE)
 
 def add_saved_hospital(user_id, hospital_name, address, phone, specialties, city, distance_km=None):
     ensure_saved_hospitals_file()
-    hospitals = load_json_file(SAVED_HOSPITALS_FILE)
-    
-    existing = [h for h in hospitals if h.get('user_id') == user_id and h.get('hospital_name') == hospital_name]
-    if existing:
-        return {"success": False, "error": "Hospital already saved"}
-    
-    hospital = {
-        "id": len(hospitals) + 1,
-        "user_id": user_id,
-        "hospital_name": hospital_name,
-        "address": address,
-        "phone": phone,
-        "specialties": specialties,
-        "city": city,
-        "distance_km": distance_km,
-        "saved_at": datetime.now().isoformat()
-    }
-    
-    hospitals.append(hospital)
-    save_json_file(SAVED_HOSPITALS_FILE, hospitals)
+    with storage.file_lock(SAVED_HOSPITALS_FILE):
+        existing = get_store().find(SAVED_HOSPITALS_FILE, user_id=user_id, hospital_name=hospital_name)
+        if existing:
+            return {"success": False, "error": "Hospital already saved"}
+        
+        hospital = {
+            "id": get_store().next_id(SAVED_HOSPITALS_FILE),
+            "user_id": user_id,
+            "hospital_name": hospital_name,
+            "address": address,
+            "phone": phone,
+            "specialties": specialties,
+            "city": city,
+            "distance_km": distance_km,
+            "saved_at": datetime.now().isoformat()
+        }
+        
+        get_store().add(SAVED_HOSPITALS_FILE, hospital)
     return {"success": True, "hospital": hospital}
 
 def get_saved_hospitals(user_id=None):
     ensure_saved_hospitals_file()
-    hospitals = load_json_file(SAVED_HOSPITALS_FILE)
-    
     if user_id:
-        hospitals = [h for h in hospitals if h.get('user_id') == user_id]
+        return get_store().find(SAVED_HOSPITALS_FILE, user_id=user_id)
     
-    return hospitals
+    return load_json_file(SAVED_HOSPITALS_FILE)
 
 def delete_saved_hospital(hospital_id):
     ensure_saved_hospitals_file()
-    hospitals = load_json_file(SAVED_HOSPITALS_FILE)
-    hospitals = [h for h in hospitals if h['id'] != hospital_id]
-    save_json_file(SAVED_HOSPITALS_FILE, hospitals)
-    return True
+    return get_store().delete(SAVED_HOSPITALS_FILE, hospital_id)
 
 SUPPORT_TICKETS_FILE = os.path.join(DATA_DIR, "support_tickets.json")
 
 def ensure_support_tickets_file():
     ensure_data_directory()
-    if not os.path.exists(SUPPORT_TICKETS_FILE):
-        with open(SUPPORT_TICKETS_FILE, 'w') as f:
-            json.dump([], f)
+    storage.ensure_json_file(SUPPORT_TICKETS_FILE, [])
+    recover_collection(SUPPORT_TICKETS_FILE)
 
 def add_support_ticket(user_id, user_name, user_email, category, description, language):
     ensure_support_tickets_file()
-    tickets = load_json_file(SUPPORT_TICKETS_FILE)
     
     ticket = {
-        "id": len(tickets) + 1,
+        "id": get_store().next_id(SUPPORT_TICKETS_FILE),
         "user_id": user_id,
         "user_name": user_name,
         "user_email": user_email,
@@ -401,74 +315,66 @@ def add_support_ticket(user_id, user_name, user_email, category, description, la
         "created_at": datetime.now().isoformat()
     }
     
-    tickets.append(ticket)
-    save_json_file(SUPPORT_TICKETS_FILE, tickets)
+    get_store().add(SUPPORT_TICKETS_FILE, ticket)
     return {"success": True, "ticket": ticket}
 
 def get_support_tickets(user_id=None):
     ensure_support_tickets_file()
-    tickets = load_json_file(SUPPORT_TICKETS_FILE)
-    
     if user_id:
-        tickets = [t for t in tickets if t.get('user_id') == user_id]
+        return get_store().find(SUPPORT_TICKETS_FILE, user_id=user_id)
     
-    return tickets
+    return load_json_file(SUPPORT_TICKETS_FILE)
 
 HEALTH_PROFILES_FILE = os.path.join(DATA_DIR, "health_profiles.json")
 
 def ensure_health_profiles_file():
     ensure_data_directory()
-    if not os.path.exists(HEALTH_PROFILES_FILE):
-        with open(HEALTH_PROFILES_FILE, 'w') as f:
-            json.dump([], f)
+    storage.ensure_json_file(HEALTH_PROFILES_FILE, [])
+    recover_collection(HEALTH_PROFILES_FILE)
 
 def save_health_profile(user_id, profile_data):
     ensure_health_profiles_file()
-    profiles = load_json_file(HEALTH_PROFILES_FILE)
-    
-    existing_index = None
-    for i, p in enumerate(profiles):
-        if p.get('user_id') == user_id:
-            existing_index = i
-            break
-    
-    profile = {
-        "id": len(profiles) + 1 if existing_index is None else profiles[existing_index]['id'],
-        "user_id": user_id,
-        "blood_type": profile_data.get('blood_type', ''),
-        "height": profile_data.get('height', 0),
-        "weight": profile_data.get('weight', 0),
-        "date_of_birth": profile_data.get('date_of_birth', ''),
-        "gender": profile_data.get('gender', ''),
-        "allergies": profile_data.get('allergies', ''),
-        "chronic_conditions": profile_data.get('chronic_conditions', ''),
-        "current_medications": profile_data.get('current_medications', ''),
-        "emergency_contact_name": profile_data.get('emergency_contact_name', ''),
-        "emergency_contact_phone": profile_data.get('emergency_contact_phone', ''),
-        "primary_doctor": profile_data.get('primary_doctor', ''),
-        "smoking_status": profile_data.get('smoking_status', ''),
-        "alcohol_status": profile_data.get('alcohol_status', ''),
-        "exercise_frequency": profile_data.get('exercise_frequency', ''),
-        "updated_at": datetime.now().isoformat()
-    }
-    
-    if existing_index is not None:
-        profiles[existing_index] = profile
-    else:
-        profiles.append(profile)
-    
-    save_json_file(HEALTH_PROFILES_FILE, profiles)
+    with storage.file_lock(HEALTH_PROFILES_FILE):
+        profiles = load_json_file(HEALTH_PROFILES_FILE)
+        
+        existing_index = None
+        for i, p in enumerate(profiles):
+            if p.get('user_id') == user_id:
+                existing_index = i
+                break
+        
+        profile = {
+            "id": get_store().next_id(HEALTH_PROFILES_FILE) if existing_index is None else profiles[existing_index]['id'],
+            "user_id": user_id,
+            "blood_type": profile_data.get('blood_type', ''),
+            "height": profile_data.get('height', 0),
+            "weight": profile_data.get('weight', 0),
+            "date_of_birth": profile_data.get('date_of_birth', ''),
+            "gender": profile_data.get('gender', ''),
+            "allergies": profile_data.get('allergies', ''),
+            "chronic_conditions": profile_data.get('chronic_conditions', ''),
+            "current_medications": profile_data.get('current_medications', ''),
+            "emergency_contact_name": profile_data.get('emergency_contact_name', ''),
+            "emergency_contact_phone": profile_data.get('emergency_contact_phone', ''),
+            "primary_doctor": profile_data.get('primary_doctor', ''),
+            "smoking_status": profile_data.get('smoking_status', ''),
+            "alcohol_status": profile_data.get('alcohol_status', ''),
+            "exercise_frequency": profile_data.get('exercise_frequency', ''),
+            "updated_at": datetime.now().isoformat()
+        }
+        
+        if existing_index is not None:
+            profiles[existing_index] = profile
+        else:
+            profiles.append(profile)
+        
+        save_json_file(HEALTH_PROFILES_FILE, profiles)
     return {"success": True, "profile": profile}
 
 def get_health_profile(user_id):
     ensure_health_profiles_file()
-    profiles = load_json_file(HEALTH_PROFILES_FILE)
-    
-    for profile in profiles:
-        if profile.get('user_id') == user_id:
-            return profile
-    
-    return None
+    profiles = get_store().find(HEALTH_PROFILES_FILE, user_id=user_id)
+    return profiles[0] if profiles else None
 
 def get_health_context_for_ai(user_id):
     """Get health profile formatted for AI context"""
@@ -500,93 +406,126 @@ def get_health_context_for_ai(user_id):
     return None
 
 ANALYTICS_FILE = os.path.join(DATA_DIR, "analytics.json")
+# Buffered analytics increments are flushed once this many events pile up,
+# this many seconds after the first buffered event, or at process exit
+ANALYTICS_FLUSH_EVENTS = 50
+ANALYTICS_FLUSH_SECONDS = 30
+
+_analytics_lock = threading.Lock()
+_pending_analytics = {}
+_pending_event_count = 0
+_flush_timer = None
+
+def empty_analytics():
+    return {
+        "feature_clicks": {},
+        "language_usage": {},
+        "symptom_keywords": {},
+        "role_sessions": {"Patient": 0, "Doctor": 0},
+        "daily_visits": {},
+        "total_sessions": 0
+    }
 
 def ensure_analytics_file():
     ensure_data_directory()
-    if not os.path.exists(ANALYTICS_FILE):
-        initial_data = {
-            "feature_clicks": {},
-            "language_usage": {},
-            "symptom_keywords": {},
-            "role_sessions": {"Patient": 0, "Doctor": 0},
-            "daily_visits": {},
-            "total_sessions": 0
-        }
-        with open(ANALYTICS_FILE, 'w') as f:
-            json.dump(initial_data, f, indent=2)
+    storage.ensure_json_file(ANALYTICS_FILE, empty_analytics())
 
-def load_analytics():
+def read_analytics_file():
     ensure_analytics_file()
-    try:
-        with open(ANALYTICS_FILE, 'r') as f:
-            return json.load(f)
-    except:
-        return {
-            "feature_clicks": {},
-            "language_usage": {},
-            "symptom_keywords": {},
-            "role_sessions": {"Patient": 0, "Doctor": 0},
-            "daily_visits": {},
-            "total_sessions": 0
-        }
+    return storage.read_json(ANALYTICS_FILE, empty_analytics())
+
+def load_analytics():
+    """Counts on disk plus this process's increments that haven't been flushed yet"""
+    analytics = read_analytics_file()
+    with _analytics_lock:
+        pending = dict(_pending_analytics)
+    merge_analytics(analytics, pending)
+    return analytics
 
 def save_analytics(data):
     ensure_analytics_file()
-    with open(ANALYTICS_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+    storage.write_json(ANALYTICS_FILE, data)
+
+def update_analytics(mutate):
+    """Locked read-modify-write of analytics.json so concurrent sessions don't lose counts"""
+    ensure_analytics_file()
+    with storage.file_lock(ANALYTICS_FILE):
+        analytics = read_analytics_file()
+        mutate(analytics)
+        save_analytics(analytics)
+
+def merge_analytics(analytics, increments):
+    for (section, key), amount in increments.items():
+        if section == "total_sessions":
+            analytics["total_sessions"] = analytics.get("total_sessions", 0) + amount
+        elif section == "role_sessions":
+            if key in analytics["role_sessions"]:
+                analytics["role_sessions"][key] += amount
+        else:
+            counts = analytics.setdefault(section, {})
+            counts[key] = counts.get(key, 0) + amount
+
+def flush_analytics():
+    """Add buffered increments to the counts on disk under the file lock"""
+    global _pending_analytics, _pending_event_count, _flush_timer
+    with _analytics_lock:
+        increments = _pending_analytics
+        _pending_analytics = {}
+        _pending_event_count = 0
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+    
+    if not increments:
+        return
+    
+    try:
+        update_analytics(lambda analytics: merge_analytics(analytics, increments))
+    except Exception:
+        with _analytics_lock:
+            for key, amount in increments.items():
+                _pending_analytics[key] = _pending_analytics.get(key, 0) + amount
+        raise
+
+def buffer_analytics(increments):
+    global _pending_event_count, _flush_timer
+    with _analytics_lock:
+        for key in increments:
+            _pending_analytics[key] = _pending_analytics.get(key, 0) + 1
+        _pending_event_count += 1
+        flush_now = _pending_event_count >= ANALYTICS_FLUSH_EVENTS
+        if not flush_now and _flush_timer is None:
+            _flush_timer = threading.Timer(ANALYTICS_FLUSH_SECONDS, flush_analytics)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+    
+    if flush_now:
+        flush_analytics()
+
+atexit.register(flush_analytics)
 
 def track_feature_click(feature_name):
     """Track when a feature/page is accessed"""
-    analytics = load_analytics()
-    if feature_name not in analytics["feature_clicks"]:
-        analytics["feature_clicks"][feature_name] = 0
-    analytics["feature_clicks"][feature_name] += 1
-    save_analytics(analytics)
+    buffer_analytics([("feature_clicks", feature_name)])
 
 def track_language_usage(language):
     """Track language preference usage"""
-    analytics = load_analytics()
-    if language not in analytics["language_usage"]:
-        analytics["language_usage"][language] = 0
-    analytics["language_usage"][language] += 1
-    save_analytics(analytics)
+    buffer_analytics([("language_usage", language)])
 
 def track_symptom_keyword(symptom_text):
     """Extract and track common symptom keywords (anonymized)"""
-    common_symptoms = [
-        "headache", "fever", "cough", "cold", "pain", "fatigue", "nausea",
-        "dizziness", "chest", "breathing", "stomach", "back", "joint",
-        "throat", "skin", "allergy", "infection", "weakness", "anxiety",
-        "सिरदर्द", "बुखार", "खांसी", "दर्द", "थकान", "चक्कर"
-    ]
-    
-    analytics = load_analytics()
-    symptom_lower = symptom_text.lower()
-    
-    for keyword in common_symptoms:
-        if keyword in symptom_lower:
-            if keyword not in analytics["symptom_keywords"]:
-                analytics["symptom_keywords"][keyword] = 0
-            analytics["symptom_keywords"][keyword] += 1
-    
-    save_analytics(analytics)
+    # One pass over the text for the whole multilingual dictionary in symptom_keywords.json
+    keywords = keyword_matcher.get_symptom_matcher().matching_keywords(symptom_text)
+    buffer_analytics([("symptom_keywords", keyword) for keyword in keywords])
 
 def track_role_session(role):
     """Track session by user role"""
-    analytics = load_analytics()
-    if role in analytics["role_sessions"]:
-        analytics["role_sessions"][role] += 1
-    save_analytics(analytics)
+    buffer_analytics([("role_sessions", role)])
 
 def track_daily_visit():
     """Track daily unique visits"""
-    analytics = load_analytics()
     today = datetime.now().strftime("%Y-%m-%d")
-    if today not in analytics["daily_visits"]:
-        analytics["daily_visits"][today] = 0
-    analytics["daily_visits"][today] += 1
-    analytics["total_sessions"] += 1
-    save_analytics(analytics)
+    buffer_analytics([("daily_visits", today), ("total_sessions", None)])
 
 def get_analytics_summary():
     """Get analytics summary for dashboard"""
@@ -639,3 +578,22 @@ def get_public_stats():
         "symptoms_analyzed": symptoms_analyzed,
         "total_visits": total_visits
     }
+
+COLLECTION_FILES = [
+    APPOINTMENTS_FILE, PRESCRIPTIONS_FILE, HEALTH_RECORDS_FILE, REMINDERS_FILE,
+    MEDICATIONS_FILE, SAVED_HOSPITALS_FILE, SUPPORT_TICKETS_FILE, HEALTH_PROFILES_FILE
+]
+
+def migrate_to_sqlite():
+    """One-shot import of every JSON collection (snapshot plus journal) into health_data.db"""
+    ensure_data_directory()
+    store = storage.create_store("sqlite", DATA_DIR)
+    return {os.path.basename(f): store.migrate_from_json(f) for f in COLLECTION_FILES}
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:] == ["migrate-sqlite"]:
+        for collection, count in migrate_to_sqlite().items():
+            print(f"{collection}: {count} records imported")
+    else:
+        print("Usage: python data_manager.py migrate-sqlite")
@@ -0,0 +1,107 @@
+import json
+import os
+import unicodedata
+from collections import deque
+
+SYMPTOM_KEYWORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "symptom_keywords.json")
+
+def is_word_char(char):
+    # Letters, combining marks (Indic vowel signs, viramas) and digits all belong to a word
+    return unicodedata.category(char)[0] in ("L", "M", "N")
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher: finds every keyword occurring in a text in a single
+    pass, independent of how many keywords are in the dictionary.
+    Matching is case-insensitive (keywords and text are lowercased).
+    """
+
+    def __init__(self, keywords):
+        self.keywords = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for keyword in keywords:
+            keyword = keyword.lower()
+            if keyword and keyword not in self.keywords:
+                self._insert(keyword, len(self.keywords))
+                self.keywords.append(keyword)
+        self._build_failure_links()
+
+    def _insert(self, keyword, index):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(index)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text, whole_words=False):
+        """Return (start, end, keyword) for every occurrence, in order of where they end."""
+        text = text.lower()
+        goto, fail, output = self._goto, self._fail, self._output
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            for index in output[state]:
+                keyword = self.keywords[index]
+                start = position - len(keyword) + 1
+                end = position + 1
+                if whole_words and not self._on_word_boundaries(text, start, end):
+                    continue
+                matches.append((start, end, keyword))
+        return matches
+
+    def _on_word_boundaries(self, text, start, end):
+        if start > 0 and is_word_char(text[start - 1]):
+            return False
+        if end < len(text) and is_word_char(text[end]):
+            return False
+        return True
+
+    def matching_keywords(self, text, whole_words=False):
+        """Distinct keywords found in text, in dictionary order."""
+        found = {keyword for _, _, keyword in self.find_all(text, whole_words)}
+        return [keyword for keyword in self.keywords if keyword in found]
+
+def load_keyword_dictionary(filepath=SYMPTOM_KEYWORDS_FILE):
+    """Flatten a {language: [keywords]} JSON file into one keyword list."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        by_language = json.load(f)
+    keywords = []
+    for language_keywords in by_language.values():
+        keywords.extend(language_keywords)
+    return keywords
+
+_symptom_matcher = None
+
+def get_symptom_matcher():
+    global _symptom_matcher
+    if _symptom_matcher is None:
+        _symptom_matcher = AhoCorasick(load_keyword_dictionary())
+    return _symptom_matcher
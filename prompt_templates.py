@@ -0,0 +1,203 @@
+"""
+System prompts for symptom analysis and medical chat, split into a static
+part that depends only on (user role, language) and a small per-request
+context (health profile, severity). Each static variant is built once; its
+text can be stored with the provider as an explicit context cache
+(ContextCache) so later calls send only the per-request part.
+"""
+import datetime
+import functools
+import threading
+from google.genai import types
+import rate_limiter
+import resilience
+
+class PromptTemplate:
+    def __init__(self, name, text):
+        self.name = name
+        self.text = text
+        # Good enough for the cache size threshold
+        self.token_estimate = rate_limiter.estimate_tokens(text)
+
+@functools.lru_cache(maxsize=None)
+def symptom_analysis_template(user_role, language):
+    if user_role == "Patient":
+        text = (
+            f"You are an AI medical assistant analyzing patient symptoms. The patient is describing symptoms in {language}. "
+            "Generate a structured medical report with the following sections in JSON format: "
+            "1) 'symptoms_summary': Brief, easy-to-understand summary (2-3 sentences max) "
+            "2) 'possible_conditions': List of 2-4 possible conditions using simple terms (not a diagnosis) "
+            "3) 'severity_level': Low, Medium, or High "
+            "4) 'recommendations': 3-5 simple, actionable health tips the patient can follow at home "
+            "5) 'urgent_care_needed': true or false "
+            "6) 'when_to_see_doctor': Clear guidance on when to seek medical help "
+            "7) 'allergy_warnings': Any warnings based on patient allergies (empty list if none) "
+            "8) 'condition_considerations': How existing conditions might affect this (empty string if none) "
+            "9) 'disclaimer': 'This is not a medical diagnosis. Please consult a doctor for proper evaluation.' "
+            "Use simple, everyday language. Avoid medical jargon. Be reassuring but honest about severity. "
+            "Respond with valid JSON only."
+        )
+    else:
+        text = (
+            f"You are an AI clinical decision support system. Analyzing symptoms described in {language}. "
+            "Generate a comprehensive clinical assessment in JSON format: "
+            "1) 'symptoms_summary': Detailed symptom characterization with onset, duration, quality, severity "
+            "2) 'possible_conditions': Comprehensive differential diagnosis list with ICD-10 codes where applicable "
+            "3) 'severity_level': Low, Medium, High, or Critical with clinical reasoning "
+            "4) 'recommendations': Evidence-based treatment protocols and clinical pathways "
+            "5) 'urgent_care_needed': true or false with clinical justification "
+            "6) 'follow_up_questions': Targeted clinical history questions for differential narrowing "
+            "7) 'suggested_diagnostics': Recommended laboratory tests, imaging, or procedures "
+            "8) 'red_flags': Critical symptoms requiring immediate attention "
+            "9) 'allergy_warnings': Drug allergy considerations for treatment planning "
+            "10) 'condition_considerations': Comorbidity interactions and management considerations "
+            "11) 'references': Relevant clinical guidelines or literature "
+            "Use proper medical terminology. Be thorough and precise. "
+            "Respond with valid JSON only."
+        )
+    return PromptTemplate(f"symptom_analysis/{user_role}/{language}", text)
+
+def symptom_analysis_context(health_context=None):
+    if not health_context:
+        return ""
+    return (
+        f"IMPORTANT PATIENT INFORMATION:\n{health_context}\n\n"
+        "Consider this health profile when analyzing symptoms. Pay special attention to:\n"
+        "- Any allergies when suggesting treatments\n"
+        "- Existing chronic conditions that might be related\n"
+        "- Current medications that might interact or cause side effects\n"
+        "- Lifestyle factors that could be relevant"
+    )
+
+@functools.lru_cache(maxsize=None)
+def chat_template(user_role, language):
+    if user_role == "Patient":
+        text = (
+            f"You are a compassionate AI health assistant helping patients in {language}. "
+            "RESPONSE GUIDELINES FOR PATIENTS:\n"
+            "- Keep responses SHORT and SIMPLE (2-4 paragraphs max)\n"
+            "- Use everyday language, avoid medical jargon\n"
+            "- Focus on practical, actionable advice\n"
+            "- Include safety warnings prominently\n"
+            "- ALWAYS recommend consulting a doctor for serious concerns\n"
+            "- Be empathetic, warm, and reassuring\n"
+            "- If allergies/conditions are on file, warn about relevant precautions\n"
+            "- End with a clear next step the patient can take\n"
+            "- Include disclaimer: 'This is not medical advice. Please consult a doctor.'"
+        )
+    else:
+        text = (
+            f"You are an AI clinical assistant helping doctors in {language}. "
+            "RESPONSE GUIDELINES FOR DOCTORS:\n"
+            "- Provide DETAILED, comprehensive medical information\n"
+            "- Use proper medical terminology and classifications (ICD codes if relevant)\n"
+            "- Include differential diagnoses with reasoning\n"
+            "- Cite evidence-based guidelines and research when applicable\n"
+            "- Discuss mechanism of action, pharmacokinetics where relevant\n"
+            "- Include contraindications, drug interactions, dosing considerations\n"
+            "- Provide clinical decision support with risk stratification\n"
+            "- Suggest relevant diagnostic tests and their interpretation\n"
+            "- Reference treatment protocols and clinical pathways\n"
+            "- Be thorough and precise - doctors need complete information"
+        )
+    return PromptTemplate(f"chat/{user_role}/{language}", text)
+
+def chat_context(user_role, health_context=None, severity_level=None):
+    """Per-request additions to the chat prompt (patients only, as before)."""
+    if user_role != "Patient":
+        return ""
+    parts = []
+    if health_context:
+        parts.append(
+            f"Patient Health Profile:\n{health_context}\n\n"
+            "Use this information to provide personalized responses. Consider their allergies, "
+            "existing conditions, and current medications when giving advice."
+        )
+    if severity_level in ["High", "Critical"]:
+        parts.append("IMPORTANT: This appears to be a high-severity situation. Strongly emphasize seeking immediate "
+                     "medical attention. Be direct about urgency while remaining calm.")
+    elif severity_level == "Medium":
+        parts.append("This is a moderate concern. Recommend scheduling a doctor visit soon. "
+                     "Provide helpful interim guidance.")
+    return "\n\n".join(parts)
+
+class ContextCache:
+    """
+    Explicit provider-side caches (client.caches.create) for static prompt
+    templates, one per (model, template), recreated shortly before they
+    expire. Templates smaller than the model's minimum cacheable size, or
+    whose cache could not be created, are sent inline instead (get() returns
+    None), so callers always have a working fallback.
+    """
+
+    def __init__(self, get_client, ttl_seconds=3600, min_tokens=None, enabled=True):
+        self.get_client = get_client
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens or {}
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._caches = {}
+        self._failed = set()
+        self._building = set()
+        self._stats = {"created": 0, "hits": 0, "too_small": 0, "errors": 0}
+
+    def get(self, model, template):
+        """Name of a live cached content holding template.text for model, or None."""
+        if not self.enabled:
+            return None
+        if template.token_estimate < self.min_tokens.get(model, 0):
+            self._count("too_small")
+            return None
+
+        key = (model, template.name)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        with self._lock:
+            if key in self._failed:
+                return None
+            entry = self._caches.get(key)
+            if entry and entry[1] > now:
+                self._stats["hits"] += 1
+                return entry[0]
+            if key in self._building:
+                # Another thread is creating it; the old cache (refreshed a
+                # minute early) still works, otherwise send the prompt inline
+                return entry[0] if entry else None
+            self._building.add(key)
+
+        try:
+            cache = self.get_client().caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    display_name=template.name[:128],
+                    system_instruction=template.text,
+                    ttl=f"{self.ttl_seconds}s"
+                )
+            )
+        except ValueError:
+            raise
+        except Exception as e:
+            # A rejection (e.g. below the provider's minimum size) is remembered;
+            # an outage just means sending the prompt inline this time
+            with self._lock:
+                if not resilience.is_transient_error(e):
+                    self._failed.add(key)
+                self._stats["errors"] += 1
+            return None
+        finally:
+            with self._lock:
+                self._building.discard(key)
+
+        # Refresh a minute early so a request never races the expiry
+        expires = now + datetime.timedelta(seconds=max(self.ttl_seconds - 60, 1))
+        with self._lock:
+            self._caches[key] = (cache.name, expires)
+            self._stats["created"] += 1
+        return cache.name
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, live=len(self._caches))
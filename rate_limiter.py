@@ -0,0 +1,192 @@
+"""
+Client-side requests-per-minute and tokens-per-minute limits for model calls,
+one pair of token buckets per model. Waiting callers are served by priority
+lane (lower number first), then in arrival order.
+
+Buckets normally live in memory and limit one process. A FileBucketStore
+keeps them in small JSON files under an fcntl lock instead, so every
+process sharing the directory draws from the same quota.
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+import storage
+
+PRIORITY_URGENT = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_LOOKUP = 2
+PRIORITY_BACKGROUND = 3
+
+_lane = threading.local()
+
+class RateLimitExceeded(Exception):
+    """The call could not get quota within the allowed wait."""
+    pass
+
+@contextmanager
+def lane(priority):
+    """Run this thread's model calls in the given priority lane."""
+    previous = getattr(_lane, "priority", None)
+    _lane.priority = priority
+    try:
+        yield
+    finally:
+        _lane.priority = previous
+
+def current_lane(default):
+    priority = getattr(_lane, "priority", None)
+    return default if priority is None else priority
+
+def estimate_tokens(contents, max_output_tokens=None):
+    """Rough pre-call estimate: ~4 characters per input token plus the output allowance."""
+    if isinstance(contents, str):
+        chars = len(contents)
+    elif isinstance(contents, (list, tuple)):
+        chars = 0
+        for item in contents:
+            if isinstance(item, str):
+                chars += len(item)
+            else:
+                # types.Content: count its text parts
+                chars += sum(len(part.text or "") for part in getattr(item, "parts", None) or [])
+    else:
+        chars = 0
+    return chars // 4 + (max_output_tokens or 0)
+
+def refill(state, capacity, per_second, now):
+    tokens, updated = state
+    return [min(capacity, tokens + (now - updated) * per_second), now]
+
+class MemoryBucketStore:
+    def __init__(self):
+        self._state = {}
+
+    def take(self, name, limits, amounts, now):
+        """
+        Take `amounts` from every bucket of `name` if all of them have enough;
+        returns 0, or the seconds until they would.
+        """
+        states = self._state.setdefault(name, [[capacity, now] for capacity, _ in limits])
+        return take_all(states, limits, amounts, now)
+
+    def adjust(self, name, limits, index, amount, now):
+        states = self._state.get(name)
+        if states:
+            states[index] = refill(states[index], *limits[index], now)
+            states[index][0] -= amount
+
+class FileBucketStore:
+    """Bucket state in <directory>/<name>.json, read-modify-written under an fcntl lock."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name + ".json")
+
+    def take(self, name, limits, amounts, now):
+        path = self._path(name)
+        with storage.file_lock(path):
+            states = storage.read_json(path, {}).get("buckets") or [[capacity, now] for capacity, _ in limits]
+            wait = take_all(states, limits, amounts, now)
+            if wait == 0:
+                storage.write_json(path, {"buckets": states})
+            return wait
+
+    def adjust(self, name, limits, index, amount, now):
+        path = self._path(name)
+        with storage.file_lock(path):
+            states = storage.read_json(path, {}).get("buckets")
+            if states:
+                states[index] = refill(states[index], *limits[index], now)
+                states[index][0] -= amount
+                storage.write_json(path, {"buckets": states})
+
+def take_all(states, limits, amounts, now):
+    wait = 0.0
+    for i, (capacity, per_second) in enumerate(limits):
+        states[i] = refill(states[i], capacity, per_second, now)
+        missing = min(amounts[i], capacity) - states[i][0]
+        if missing > 0:
+            wait = max(wait, missing / per_second)
+    if wait == 0:
+        for i in range(len(limits)):
+            states[i][0] -= min(amounts[i], limits[i][0])
+    return wait
+
+class RateLimiter:
+    """
+    `limits` maps model -> {"rpm": ..., "tpm": ...}; models without an entry
+    are not limited. `acquire` blocks until the model has one request and the
+    estimated tokens available, or raises RateLimitExceeded after max_wait.
+    Only the highest-priority waiter draws from a bucket, so a background
+    lookup never takes the quota an urgent call is waiting for.
+    """
+
+    def __init__(self, limits, store=None, max_wait=30.0, clock=time.time):
+        self.limits = limits
+        self.store = store or MemoryBucketStore()
+        self.max_wait = max_wait
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._waiters = {}
+        self._seq = itertools.count()
+        self._stats = {"acquired": 0, "waited": 0, "wait_seconds": 0.0, "timeouts": 0}
+
+    def _bucket_limits(self, model):
+        limit = self.limits[model]
+        return [(limit["rpm"], limit["rpm"] / 60.0), (limit["tpm"], limit["tpm"] / 60.0)]
+
+    def acquire(self, model, tokens, priority=PRIORITY_INTERACTIVE):
+        if model not in self.limits:
+            return
+        limits = self._bucket_limits(model)
+        start = time.monotonic()
+        deadline = start + self.max_wait
+
+        with self._cond:
+            waiters = self._waiters.setdefault(model, [])
+            entry = (priority, next(self._seq))
+            heapq.heappush(waiters, entry)
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if waiters[0] == entry:
+                        wait = self.store.take(model, limits, [1, tokens], self._clock())
+                        if wait == 0:
+                            waited = time.monotonic() - start
+                            self._stats["acquired"] += 1
+                            if waited > 0.001:
+                                self._stats["waited"] += 1
+                                self._stats["wait_seconds"] += waited
+                            return
+                    else:
+                        wait = remaining
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise RateLimitExceeded(f"Rate limit for {model}: no quota within {self.max_wait:.0f}s")
+                    self._cond.wait(min(wait, remaining))
+            finally:
+                waiters.remove(entry)
+                heapq.heapify(waiters)
+                self._cond.notify_all()
+
+    def settle(self, model, estimated_tokens, actual_tokens):
+        """Correct the token bucket once the response reports its real usage."""
+        if model not in self.limits or actual_tokens is None:
+            return
+        limits = self._bucket_limits(model)
+        charged = min(estimated_tokens, limits[1][0])
+        with self._cond:
+            self.store.adjust(model, limits, 1, actual_tokens - charged, self._clock())
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["waiting"] = {model: len(waiters) for model, waiters in self._waiters.items() if waiters}
+        return stats
@@ -0,0 +1,224 @@
+"""
+Retry and fail-fast policy for calls to the AI provider: decorrelated-jitter
+backoff, a retry budget shared by every caller in the process, and one
+circuit breaker per model.
+"""
+import random
+import threading
+import time
+from collections import deque
+import httpx
+
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while a model's breaker is open."""
+    pass
+
+def is_transient_error(e):
+    """Errors worth retrying: overload, quota, server errors, timeouts and dropped connections."""
+    if isinstance(e, CircuitOpenError):
+        return False
+    if isinstance(e, httpx.TransportError):
+        return True
+    if getattr(e, "code", None) in TRANSIENT_STATUS_CODES:
+        return True
+    error_msg = str(e)
+    return ("503" in error_msg or "429" in error_msg or "overloaded" in error_msg.lower()
+            or "UNAVAILABLE" in error_msg or "RESOURCE_EXHAUSTED" in error_msg)
+
+def is_quota_error(e):
+    return getattr(e, "code", None) == 429 or "RESOURCE_EXHAUSTED" in str(e)
+
+def decorrelated_jitter(previous_delay, base_delay, max_delay, rng=random):
+    """Next sleep: uniform between the base delay and three times the previous one, capped."""
+    return min(max_delay, rng.uniform(base_delay, max(base_delay, previous_delay * 3)))
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive provider failures and then
+    rejects calls for `reset_timeout` seconds. After that a single probe call
+    is let through (half-open): success closes the breaker, failure reopens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._clock() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._probing = False
+
+    def release(self):
+        """End a half-open probe that failed for reasons unrelated to the provider."""
+        with self._lock:
+            self._probing = False
+
+class RetryBudget:
+    """
+    Retries allowed over a sliding `window` seconds: `ratio` of the calls made
+    in that window, but always at least `min_retries`. Keeps retries from
+    multiplying load while the provider is already struggling.
+    """
+
+    def __init__(self, ratio=0.2, min_retries=10, window=10.0, clock=time.monotonic):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._calls = deque()
+        self._retries = deque()
+
+    def _trim(self, now):
+        for events in (self._calls, self._retries):
+            while events and now - events[0] > self.window:
+                events.popleft()
+
+    def record_call(self):
+        with self._lock:
+            now = self._clock()
+            self._trim(now)
+            self._calls.append(now)
+
+    def try_spend(self):
+        with self._lock:
+            now = self._clock()
+            self._trim(now)
+            if len(self._retries) >= max(self.min_retries, self.ratio * len(self._calls)):
+                return False
+            self._retries.append(now)
+            return True
+
+class RetryPolicy:
+    """
+    Shared by every model call. `call(model, func)` runs func with retries;
+    streaming code that can only retry up to its first chunk uses the same
+    steps directly: `before_attempt`, then exactly one of `on_success`,
+    `on_failure` or `on_cancel`.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=8.0, budget=None,
+                 failure_threshold=5, reset_timeout=30.0, sleep=time.sleep, rng=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "retries": 0, "budget_exhausted": 0, "rejected": 0, "failures": 0}
+
+    def breaker(self, model):
+        with self._lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[model]
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def before_attempt(self, model, attempt):
+        if not self.breaker(model).allow():
+            self._count("rejected")
+            raise CircuitOpenError(f"{model} is unavailable; not retrying until the circuit closes")
+        if attempt == 0:
+            self._count("calls")
+            self.budget.record_call()
+
+    def on_success(self, model):
+        self.breaker(model).record_success()
+
+    def on_cancel(self, model):
+        """The attempt ended with neither success nor failure (e.g. a stream closed part-way)."""
+        self.breaker(model).release()
+
+    def on_failure(self, model, e, attempt, previous_delay, retry=True):
+        """
+        Seconds to wait before retrying, or None if the error should be raised.
+        retry=False only records the failure (e.g. a stream cut after its first
+        chunk), without spending retry budget.
+        """
+        if not is_transient_error(e):
+            self.breaker(model).release()
+            return None
+        # Quota errors mean "slow down", not "provider down": retried, but they don't trip the breaker
+        if is_quota_error(e):
+            self.breaker(model).release()
+        else:
+            self.breaker(model).record_failure()
+        self._count("failures")
+        if not retry or attempt >= self.max_attempts - 1:
+            return None
+        if not self.budget.try_spend():
+            self._count("budget_exhausted")
+            return None
+        self._count("retries")
+        return decorrelated_jitter(previous_delay, self.base_delay, self.max_delay, self.rng)
+
+    def call(self, model, func):
+        delay = self.base_delay
+        attempt = 0
+        while True:
+            self.before_attempt(model, attempt)
+            settled = False
+            try:
+                result = func()
+            except Exception as e:
+                settled = True
+                delay = self.on_failure(model, e, attempt, delay)
+                if delay is None:
+                    raise
+            else:
+                settled = True
+                self.on_success(model)
+                return result
+            finally:
+                # KeyboardInterrupt, SystemExit etc. must not leave a half-open probe taken
+                if not settled:
+                    self.on_cancel(model)
+            self.sleep(delay)
+            attempt += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            breakers = dict(self._breakers)
+        stats["breakers"] = {model: breaker.state for model, breaker in breakers.items()}
+        return stats
@@ -0,0 +1,104 @@
+from collections import defaultdict
+
+def ngrams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+class NgramIndex:
+    """
+    Case-insensitive substring index over one or more text fields of a
+    collection. Each distinct lowercased value is split into n-grams; a query
+    intersects the posting sets of its own n-grams, verifies the few
+    candidate values, and only then touches the matching records. Records are
+    held by reference and returned in the order they were added.
+    """
+
+    def __init__(self, records, fields, n=3):
+        self.fields = tuple(fields)
+        self.n = n
+        self._grams = defaultdict(set)
+        self._values = {}
+        self._records = {}
+        self._keys = {}
+        self._by_id = defaultdict(list)
+        self._next_seq = 0
+        for record in records:
+            self.add(record)
+
+    def _record_keys(self, record):
+        return tuple(sorted({(record.get(field) or '').lower() for field in self.fields}))
+
+    def _link(self, seq, value):
+        postings = self._values.get(value)
+        if postings is None:
+            postings = self._values[value] = set()
+            for gram in ngrams(value, self.n):
+                self._grams[gram].add(value)
+        postings.add(seq)
+
+    def _unlink(self, seq, value):
+        postings = self._values[value]
+        postings.discard(seq)
+        if not postings:
+            del self._values[value]
+            for gram in ngrams(value, self.n):
+                self._grams[gram].discard(value)
+                if not self._grams[gram]:
+                    del self._grams[gram]
+
+    def add(self, record):
+        seq = self._next_seq
+        self._next_seq += 1
+        self._records[seq] = record
+        self._by_id[record.get('id')].append(seq)
+        self._keys[seq] = self._record_keys(record)
+        for value in self._keys[seq]:
+            self._link(seq, value)
+
+    def reindex(self, record_id):
+        """Pick up in-place changes to the first record with this id (the one update_* touches)."""
+        seqs = self._by_id.get(record_id)
+        if not seqs:
+            return
+        seq = seqs[0]
+        old_keys = self._keys[seq]
+        new_keys = self._record_keys(self._records[seq])
+        if new_keys == old_keys:
+            return
+        for value in old_keys:
+            self._unlink(seq, value)
+        for value in new_keys:
+            self._link(seq, value)
+        self._keys[seq] = new_keys
+
+    def remove(self, record_id):
+        for seq in self._by_id.pop(record_id, []):
+            for value in self._keys.pop(seq):
+                self._unlink(seq, value)
+            del self._records[seq]
+
+    def _matching_values(self, needle):
+        if len(needle) < self.n:
+            return [value for value in self._values if needle in value]
+
+        posting_sets = []
+        for gram in ngrams(needle, self.n):
+            values = self._grams.get(gram)
+            if not values:
+                return []
+            posting_sets.append(values)
+        posting_sets.sort(key=len)
+        candidates = set.intersection(*posting_sets)
+        return [value for value in candidates if needle in value]
+
+    def _collect(self, values):
+        seqs = set()
+        for value in values:
+            seqs.update(self._values[value])
+        return [self._records[seq] for seq in sorted(seqs)]
+
+    def search(self, text):
+        return self._collect(self._matching_values(text.lower()))
+
+    def search_prefix(self, text):
+        prefix = text.lower()
+        return self._collect(v for v in self._matching_values(prefix) if v.startswith(prefix))
@@ -0,0 +1,68 @@
+"""
+Request coalescing: concurrent calls with the same key share one execution.
+The first caller runs the function; callers that arrive while it is still
+running wait for it and get a copy of its result (or its exception). If
+the first caller is interrupted (KeyboardInterrupt, SystemExit), a waiting
+caller runs the function again.
+"""
+import copy
+import threading
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.interrupted = False
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {}
+
+    def _count(self, kind, name):
+        stats = self._stats.setdefault(kind, {"calls": 0, "upstream": 0, "deduplicated": 0})
+        stats[name] += 1
+
+    def do(self, kind, key, func):
+        """Run func() unless an identical call (same kind and key) is already in flight."""
+        with self._lock:
+            self._count(kind, "calls")
+            call = self._calls.get((kind, key))
+            leader = call is None
+            if leader:
+                call = self._calls[(kind, key)] = _Call()
+                self._count(kind, "upstream")
+            else:
+                self._count(kind, "deduplicated")
+
+        if not leader:
+            call.done.wait()
+            if call.interrupted:
+                # The leader left without a result or error; make the call again
+                return self.do(kind, key, func)
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            result = func()
+            call.result = copy.deepcopy(result)
+            return result
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException:
+            # KeyboardInterrupt, SystemExit etc. belong to the leader's thread
+            call.interrupted = True
+            raise
+        finally:
+            with self._lock:
+                del self._calls[(kind, key)]
+            call.done.set()
+
+    def stats(self):
+        """Per kind: calls made, calls that went upstream, and calls served by another caller's request."""
+        with self._lock:
+            return {kind: dict(stats) for kind, stats in self._stats.items()}
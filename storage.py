@@ -0,0 +1,567 @@
+import fcntl
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from search_index import NgramIndex
+
+# Journal files are folded back into their snapshot once they grow past this size
+JOURNAL_COMPACT_BYTES = 256 * 1024
+
+def read_json(filepath, default=None):
+    try:
+        with open(filepath, 'r') as f:
+            return json.load(f)
+    except:
+        return [] if default is None else default
+
+def write_json(filepath, data):
+    """Write to a temp file in the same directory and os.replace it, so readers never see a partial file."""
+    directory = os.path.dirname(filepath) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(filepath) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def ensure_json_file(filepath, initial):
+    if not os.path.exists(filepath):
+        with file_lock(filepath):
+            if not os.path.exists(filepath):
+                write_json(filepath, initial)
+
+def file_signature(paths):
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+_held_locks = threading.local()
+
+@contextmanager
+def file_lock(filepath):
+    """
+    Exclusive advisory lock shared by every process and thread touching
+    filepath (via a .lock sidecar). Re-entrant within a thread, so a locked
+    read-modify-write can call other locked helpers on the same file.
+    """
+    held = getattr(_held_locks, "paths", None)
+    if held is None:
+        held = _held_locks.paths = set()
+    if filepath in held:
+        yield
+        return
+
+    with open(filepath + ".lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        held.add(filepath)
+        try:
+            yield
+        finally:
+            held.discard(filepath)
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def sequence_path(filepath):
+    return os.path.splitext(filepath)[0] + ".seq"
+
+def allocate_id(filepath, seed):
+    """
+    Hand out the next id for a collection from a sidecar counter file
+    (appointments.json -> appointments.seq). The counter is only ever
+    incremented, so ids are never reused after a delete. seed() is called
+    once, when the counter does not exist yet, and must return the highest
+    id already in the collection.
+    """
+    seq_file = sequence_path(filepath)
+    with file_lock(seq_file):
+        try:
+            with open(seq_file, 'r') as f:
+                last_id = int(f.read().strip())
+        except (OSError, ValueError):
+            last_id = seed()
+
+        next_id = last_id + 1
+        tmp_file = seq_file + ".tmp"
+        with open(tmp_file, 'w') as f:
+            f.write(str(next_id))
+        os.replace(tmp_file, seq_file)
+    return next_id
+
+def max_id(records):
+    return max((r['id'] for r in records if isinstance(r.get('id'), int)), default=0)
+
+class CacheEntry:
+    def __init__(self, signature, records):
+        self.signature = signature
+        self.records = records
+        self.indexes = {}
+        self.derived = {}
+
+def apply_change(entry, change):
+    """Apply one journal-style change ({"op": "add" | "update" | "delete", ...}) to a cache entry and its indexes."""
+    entry.derived = {}
+    op = change['op']
+    if op == 'add':
+        record = dict(change['record'])
+        entry.records.append(record)
+        for index in entry.indexes.values():
+            index.add(record)
+    elif op == 'update':
+        for record in entry.records:
+            if record.get('id') == change['id']:
+                record.update(change['changes'])
+                for index in entry.indexes.values():
+                    index.reindex(change['id'])
+                break
+    elif op == 'delete':
+        entry.records = [r for r in entry.records if r.get('id') != change['id']]
+        for index in entry.indexes.values():
+            index.remove(change['id'])
+
+class CollectionCache:
+    """
+    Read-through cache of parsed collections keyed on file path. An entry is
+    reused while the (mtime_ns, size) of its backing files is unchanged, so
+    another process writing the file invalidates it on the next read.
+    Entries also carry lazily built search indexes, which are patched along
+    with the records when this process writes.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, key, paths, loader):
+        # Must be called with self._lock held
+        signature = file_signature(paths)
+        entry = self._entries.get(key)
+        if entry is not None and entry.signature == signature:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = self._entries[key] = CacheEntry(signature, loader())
+        return entry
+
+    def get(self, key, paths, loader):
+        with self._lock:
+            return self._entry(key, paths, loader).records
+
+    def search(self, key, paths, loader, fields, text, prefix=False):
+        """Substring (or prefix) search through the entry's NgramIndex for these fields, returning copies."""
+        with self._lock:
+            entry = self._entry(key, paths, loader)
+            index = entry.indexes.get(fields)
+            if index is None:
+                index = entry.indexes[fields] = NgramIndex(entry.records, fields)
+            matches = index.search_prefix(text) if prefix else index.search(text)
+            return copy_records(matches)
+
+    def derived(self, key, paths, loader, name, builder):
+        """A value computed from the cached records (e.g. an id -> record map), rebuilt only when they change."""
+        with self._lock:
+            entry = self._entry(key, paths, loader)
+            if name not in entry.derived:
+                entry.derived[name] = builder(entry.records)
+            return entry.derived[name]
+
+    def put(self, key, paths, records):
+        with self._lock:
+            self._entries[key] = CacheEntry(file_signature(paths), records)
+
+    def apply(self, key, paths, signature_before, change):
+        """Patch the cached copy after our own write, unless someone else changed the files first."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.signature != signature_before:
+                self._entries.pop(key, None)
+                return
+            apply_change(entry, change)
+            entry.signature = file_signature(paths)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+            }
+
+cache = CollectionCache()
+
+def copy_records(records):
+    return [dict(r) for r in records]
+
+class JsonFileStore:
+    """Stores each collection as a single JSON array that is rewritten on every change."""
+
+    def _paths(self, filepath):
+        return (filepath,)
+
+    def _read(self, filepath):
+        return read_json(filepath, [])
+
+    def _records(self, filepath):
+        # Shared cached list: callers must copy before handing records out
+        return cache.get(filepath, self._paths(filepath), lambda: self._read(filepath))
+
+    def load(self, filepath):
+        return copy_records(self._records(filepath))
+
+    def _write(self, filepath, records, change):
+        signature_before = file_signature(self._paths(filepath))
+        write_json(filepath, records)
+        cache.apply(filepath, self._paths(filepath), signature_before, change)
+
+    def add(self, filepath, record):
+        with file_lock(filepath):
+            records = self.load(filepath)
+            records.append(record)
+            self._write(filepath, records, {"op": "add", "record": record})
+        return record
+
+    def update(self, filepath, record_id, changes, add_missing=False):
+        with file_lock(filepath):
+            records = self.load(filepath)
+            for record in records:
+                if record['id'] == record_id:
+                    applied = {key: value for key, value in changes.items() if add_missing or key in record}
+                    record.update(applied)
+                    self._write(filepath, records, {"op": "update", "id": record_id, "changes": applied})
+                    return record
+        return None
+
+    def delete(self, filepath, record_id):
+        with file_lock(filepath):
+            records = self.load(filepath)
+            records = [r for r in records if r['id'] != record_id]
+            self._write(filepath, records, {"op": "delete", "id": record_id})
+        return True
+
+    def replace(self, filepath, records):
+        with file_lock(filepath):
+            write_json(filepath, records)
+            cache.put(filepath, self._paths(filepath), copy_records(records))
+
+    def next_id(self, filepath):
+        return allocate_id(filepath, lambda: max_id(self._records(filepath)))
+
+    def search(self, filepath, text, fields=('patient_name',), prefix=False):
+        return cache.search(filepath, self._paths(filepath), lambda: self._read(filepath),
+                            tuple(fields), text, prefix)
+
+    def find(self, filepath, **criteria):
+        return copy_records(r for r in self._records(filepath)
+                            if all(r.get(key) == value for key, value in criteria.items()))
+
+    def recover(self, filepath):
+        pass
+
+class JournalStore(JsonFileStore):
+    """
+    Appends every mutation to a per-collection JSON Lines journal next to the
+    snapshot file (appointments.json -> appointments.jsonl). Reads replay the
+    journal on top of the snapshot; once the journal grows past
+    JOURNAL_COMPACT_BYTES it is folded back into the snapshot.
+    """
+
+    def journal_path(self, filepath):
+        return os.path.splitext(filepath)[0] + ".jsonl"
+
+    def _paths(self, filepath):
+        return (filepath, self.journal_path(filepath))
+
+    def _read(self, filepath):
+        records = read_json(filepath, [])
+        return self._replay(records, self.journal_path(filepath))
+
+    def _replay(self, records, journal_file):
+        if not os.path.exists(journal_file):
+            return records
+
+        by_id = {}
+        for record in records:
+            by_id.setdefault(record.get('id'), record)
+
+        with open(journal_file, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A crash mid-append can leave a partial last line
+                    continue
+
+                op = entry.get('op')
+                if op == 'add':
+                    record = entry['record']
+                    # Already in the snapshot if a compaction died before removing the journal
+                    if record.get('id') in by_id:
+                        continue
+                    records.append(record)
+                    by_id[record.get('id')] = record
+                elif op == 'update':
+                    record = by_id.get(entry['id'])
+                    if record is not None:
+                        record.update(entry['changes'])
+                elif op == 'delete':
+                    records = [r for r in records if r.get('id') != entry['id']]
+                    by_id.pop(entry['id'], None)
+
+        return records
+
+    def _append(self, filepath, entry):
+        journal_file = self.journal_path(filepath)
+        with file_lock(filepath):
+            signature_before = file_signature(self._paths(filepath))
+            with open(journal_file, 'a') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+
+            cache.apply(filepath, self._paths(filepath), signature_before, entry)
+
+            if size > JOURNAL_COMPACT_BYTES:
+                self.compact(filepath)
+
+    def add(self, filepath, record):
+        self._append(filepath, {"op": "add", "record": record})
+        return record
+
+    def update(self, filepath, record_id, changes, add_missing=False):
+        with file_lock(filepath):
+            for record in self._records(filepath):
+                if record['id'] == record_id:
+                    record = dict(record)
+                    applied = {key: value for key, value in changes.items() if add_missing or key in record}
+                    record.update(applied)
+                    self._append(filepath, {"op": "update", "id": record_id, "changes": applied})
+                    return record
+        return None
+
+    def delete(self, filepath, record_id):
+        self._append(filepath, {"op": "delete", "id": record_id})
+        return True
+
+    def replace(self, filepath, records):
+        with file_lock(filepath):
+            write_json(filepath, records)
+            journal_file = self.journal_path(filepath)
+            if os.path.exists(journal_file):
+                os.remove(journal_file)
+            cache.put(filepath, self._paths(filepath), copy_records(records))
+
+    def compact(self, filepath):
+        with file_lock(filepath):
+            self.replace(filepath, self.load(filepath))
+
+    def recover(self, filepath):
+        with file_lock(filepath):
+            if os.path.exists(self.journal_path(filepath)):
+                self.compact(filepath)
+
+class SqliteStore:
+    """
+    Keeps every collection in one SQLite database, one table per collection file.
+    Full records are stored as JSON; the fields the app filters on are copied into
+    indexed columns so lookups don't have to decode every row.
+    """
+
+    SEARCH_COLUMNS = {"patient_name": "patient_name_lc", "doctor_name": "doctor_name_lc"}
+    FIND_COLUMNS = {"id", "user_id", "date", "status"}
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS migrations (collection TEXT PRIMARY KEY, migrated_at TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS sequences (collection TEXT PRIMARY KEY, last_id INTEGER NOT NULL)")
+            self._local.conn = conn
+            self._local.tables = set()
+        return conn
+
+    def _table(self, filepath):
+        table = os.path.splitext(os.path.basename(filepath))[0]
+        conn = self._connect()
+        if table not in self._local.tables:
+            with conn:
+                conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{table}" ('
+                    "row_id INTEGER PRIMARY KEY AUTOINCREMENT, id INTEGER, "
+                    "patient_name_lc TEXT, doctor_name_lc TEXT, user_id TEXT, "
+                    "date TEXT, status TEXT, data TEXT NOT NULL)"
+                )
+                for column in ["id", "patient_name_lc", "user_id", "date", "status"]:
+                    conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}_{column}" ON "{table}" ({column})')
+            self._local.tables.add(table)
+        return table
+
+    def _columns(self, record):
+        user_id = record.get('user_id')
+        return (
+            record.get('id'),
+            (record.get('patient_name') or '').lower(),
+            (record.get('doctor_name') or '').lower(),
+            None if user_id is None else str(user_id),
+            record.get('date'),
+            record.get('status'),
+            json.dumps(record, ensure_ascii=False),
+        )
+
+    def _insert(self, conn, table, records):
+        conn.executemany(
+            f'INSERT INTO "{table}" (id, patient_name_lc, doctor_name_lc, user_id, date, status, data) '
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [self._columns(r) for r in records],
+        )
+
+    def _select(self, filepath, where="", params=()):
+        table = self._table(filepath)
+        rows = self._connect().execute(f'SELECT data FROM "{table}" {where} ORDER BY row_id', params)
+        return [json.loads(data) for (data,) in rows]
+
+    def load(self, filepath):
+        return self._select(filepath)
+
+    def add(self, filepath, record):
+        table = self._table(filepath)
+        conn = self._connect()
+        with conn:
+            self._insert(conn, table, [record])
+        return record
+
+    def update(self, filepath, record_id, changes, add_missing=False):
+        table = self._table(filepath)
+        conn = self._connect()
+        with conn:
+            row = conn.execute(
+                f'SELECT row_id, data FROM "{table}" WHERE id = ? ORDER BY row_id LIMIT 1', (record_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            record = json.loads(row[1])
+            for key, value in changes.items():
+                if add_missing or key in record:
+                    record[key] = value
+            conn.execute(
+                f'UPDATE "{table}" SET id = ?, patient_name_lc = ?, doctor_name_lc = ?, user_id = ?, '
+                "date = ?, status = ?, data = ? WHERE row_id = ?",
+                self._columns(record) + (row[0],),
+            )
+        return record
+
+    def delete(self, filepath, record_id):
+        table = self._table(filepath)
+        conn = self._connect()
+        with conn:
+            conn.execute(f'DELETE FROM "{table}" WHERE id = ?', (record_id,))
+        return True
+
+    def replace(self, filepath, records):
+        table = self._table(filepath)
+        conn = self._connect()
+        with conn:
+            conn.execute(f'DELETE FROM "{table}"')
+            self._insert(conn, table, records)
+
+    def next_id(self, filepath):
+        table = self._table(filepath)
+        conn = self._connect()
+        with conn:
+            # Take the write lock up front so two sessions can't read the same last_id
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT last_id FROM sequences WHERE collection = ?", (table,)).fetchone()
+            if row is None:
+                last_id = conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM "{table}"').fetchone()[0]
+            else:
+                last_id = row[0]
+            conn.execute(
+                "INSERT INTO sequences (collection, last_id) VALUES (?, ?) "
+                "ON CONFLICT(collection) DO UPDATE SET last_id = excluded.last_id",
+                (table, last_id + 1),
+            )
+        return last_id + 1
+
+    def search(self, filepath, text, fields=('patient_name',), prefix=False):
+        needle = text.lower()
+        if not all(field in self.SEARCH_COLUMNS for field in fields):
+            return [r for r in self.load(filepath)
+                    if any((r.get(field) or '').lower().startswith(needle) if prefix
+                           else needle in (r.get(field) or '').lower() for field in fields)]
+        if prefix:
+            # A range scan on the lowercased column can use its index
+            where = " OR ".join(f"({self.SEARCH_COLUMNS[field]} >= ? AND {self.SEARCH_COLUMNS[field]} < ?)"
+                                for field in fields)
+            return self._select(filepath, f"WHERE {where}", (needle, needle + "\U0010ffff") * len(fields))
+        where = " OR ".join(f"instr({self.SEARCH_COLUMNS[field]}, ?) > 0" for field in fields)
+        return self._select(filepath, f"WHERE {where}", (needle,) * len(fields))
+
+    def find(self, filepath, **criteria):
+        indexed = {k: v for k, v in criteria.items() if k in self.FIND_COLUMNS}
+        if not indexed:
+            return [r for r in self.load(filepath)
+                    if all(r.get(key) == value for key, value in criteria.items())]
+        where = " AND ".join(f"{key} = ?" for key in indexed)
+        params = tuple(str(v) if k == 'user_id' else v for k, v in indexed.items())
+        # user_id is stored as text, so re-check every criterion on the decoded record
+        return [r for r in self._select(filepath, f"WHERE {where}", params)
+                if all(r.get(key) == value for key, value in criteria.items())]
+
+    def recover(self, filepath):
+        """Import the JSON collection (snapshot plus any journal) the first time this table is used."""
+        self.migrate_from_json(filepath)
+
+    def migrate_from_json(self, filepath):
+        table = self._table(filepath)
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM migrations WHERE collection = ?", (table,)).fetchone():
+                return 0
+            records = JournalStore().load(filepath) if os.path.exists(filepath) else []
+            self._insert(conn, table, records)
+            conn.execute(
+                "INSERT INTO migrations (collection, migrated_at) VALUES (?, datetime('now'))", (table,)
+            )
+        return len(records)
+
+STORES = {
+    "json": JsonFileStore,
+    "journal": JournalStore,
+    "sqlite": SqliteStore,
+}
+
+def create_store(backend, data_dir):
+    if backend not in STORES:
+        raise ValueError(f"Unknown storage backend '{backend}'. Choose one of: {', '.join(STORES)}")
+    if backend == "sqlite":
+        return SqliteStore(os.path.join(data_dir, "health_data.db"))
+    return STORES[backend]()
@@ -0,0 +1,251 @@
+"""
+Background re-translation of a patient's saved prescriptions and health
+records after they switch language. Jobs are JSON files under
+DATA_DIR/translation_jobs/. A runner claims one job at a time, translates
+its records on a bounded thread pool in the background rate-limit lane, and
+checkpoints each finished record into the job file, so an interrupted run
+resumes where it stopped. Records are updated in place.
+
+    python translation_jobs.py enqueue "Ravi Kumar" "हिंदी (Hindi)"
+    python translation_jobs.py run --workers 4
+    python translation_jobs.py status
+"""
+import argparse
+import fcntl
+import glob
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime
+import ai_helper
+import data_manager
+import rate_limiter
+import storage
+
+JOBS_DIR = os.path.join(data_manager.DATA_DIR, "translation_jobs")
+TRANSLATION_JOB_WORKERS = int(os.environ.get("TRANSLATION_JOB_WORKERS", "4"))
+# Prescriptions don't record the doctor's language
+PRESCRIPTION_SOURCE_LANGUAGE = "the original language"
+UNFINISHED = ("queued", "running")
+
+_runner_lock = threading.Lock()
+_runner = None
+_wakeup = False
+
+def job_path(job_id):
+    return os.path.join(JOBS_DIR, f"{job_id}.json")
+
+def load_job(job_id):
+    return storage.read_json(job_path(job_id), {}) or None
+
+def list_jobs():
+    jobs = [storage.read_json(path, {}) for path in glob.glob(os.path.join(JOBS_DIR, "*.json"))]
+    return sorted((job for job in jobs if job), key=lambda job: job["id"])
+
+def update_job(job_id, **changes):
+    path = job_path(job_id)
+    with storage.file_lock(path):
+        job = storage.read_json(path, {})
+        job.update(changes, updated_at=datetime.now().isoformat())
+        storage.write_json(path, job)
+    return job
+
+def enqueue(patient_name, target_language):
+    """
+    Queue re-translation of the patient's records. A patient has at most one
+    unfinished job: asking for the same language again returns it, and a
+    different language supersedes it.
+    """
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    with storage.file_lock(os.path.join(JOBS_DIR, "queue")):
+        for job in list_jobs():
+            if job["patient_name"] == patient_name and job["status"] in UNFINISHED:
+                if job["target_language"] == target_language:
+                    return job
+                update_job(job["id"], status="superseded")
+
+        job_id = storage.allocate_id(os.path.join(JOBS_DIR, "jobs.json"), lambda: 0)
+        job = {
+            "id": job_id,
+            "patient_name": patient_name,
+            "target_language": target_language,
+            "status": "queued",
+            "total": None,
+            "done": [],
+            "failed": {},
+            "created_at": datetime.now().isoformat(),
+            "updated_at": datetime.now().isoformat()
+        }
+        storage.write_json(job_path(job_id), job)
+    return job
+
+@contextmanager
+def claim(job_id):
+    """Yields whether this runner holds the job; another runner (thread or process) already working it wins."""
+    with open(job_path(job_id) + ".run", 'a') as run_file:
+        try:
+            fcntl.flock(run_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(run_file, fcntl.LOCK_UN)
+
+def prescription_text(prescription):
+    return f"""
+Medication: {prescription.get('medication', '')}
+Dosage: {prescription.get('dosage', '')}
+Instructions: {prescription.get('instructions', '')}
+"""
+
+def patient_tasks(patient_name):
+    """
+    (checkpoint key, collection, record) for every record of the patient,
+    matched the way their own pages list them (case-insensitive substring).
+    """
+    store = data_manager.get_store()
+    tasks = []
+    for collection, filepath in [("prescriptions", data_manager.PRESCRIPTIONS_FILE),
+                                 ("health_records", data_manager.HEALTH_RECORDS_FILE)]:
+        for record in store.search(filepath, patient_name):
+            tasks.append((f"{collection}:{record['id']}", collection, record))
+    return tasks
+
+def translate_record(collection, record, target_language):
+    """Translate one record in place; returns None, or the error message."""
+    if collection == "prescriptions":
+        if record.get("language") == target_language and record.get("translated_text"):
+            return None
+        result = ai_helper.generate_prescription_translation(
+            prescription_text(record), PRESCRIPTION_SOURCE_LANGUAGE, target_language
+        )
+        if not result.get("success"):
+            return result.get("error") or "Translation failed"
+        data_manager.update_prescription(record["id"], translated_text=result["translation"],
+                                         language=target_language)
+        return None
+
+    if (not record.get("description") or record.get("language") == target_language
+            or record.get("translated_language") == target_language):
+        return None
+    result = ai_helper.translate_text(record["description"], record.get("language", "English"), target_language)
+    if not result.get("success"):
+        return result.get("error") or "Translation failed"
+    data_manager.set_health_record_translation(record["id"], target_language, result["translation"])
+    return None
+
+def translate_in_background(collection, record, target_language):
+    with rate_limiter.lane(rate_limiter.PRIORITY_BACKGROUND):
+        return translate_record(collection, record, target_language)
+
+def run_job(job_id, workers=TRANSLATION_JOB_WORKERS):
+    """Work one job to completion (or until it is superseded); returns the final job, or None if it was busy."""
+    with claim(job_id) as claimed:
+        if not claimed:
+            return None
+        job = load_job(job_id)
+        if not job or job["status"] not in UNFINISHED:
+            return job
+
+        done = set(job["done"])
+        tasks = [task for task in patient_tasks(job["patient_name"]) if task[0] not in done]
+        job = update_job(job_id, status="running", total=len(done) + len(tasks))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(translate_in_background, collection, record, job["target_language"]): key
+                for key, collection, record in tasks
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    error = future.result()
+                except Exception as e:
+                    error = str(e)
+                # Checkpoint from this thread only, so the job file has a single writer
+                if error is None:
+                    job["done"].append(key)
+                    job["failed"].pop(key, None)
+                else:
+                    job["failed"][key] = error
+                # Status is left to update_job's merge, so a concurrent "superseded" is not overwritten
+                job = update_job(job_id, done=job["done"], failed=job["failed"])
+                if job["status"] == "superseded":
+                    for pending in futures:
+                        pending.cancel()
+                    break
+
+        if job["status"] == "running":
+            job = update_job(job_id, status="done", finished_at=datetime.now().isoformat())
+        return job
+
+def run_pending(workers=TRANSLATION_JOB_WORKERS):
+    """
+    Run unfinished jobs, oldest first, until none are left that this call has
+    not tried (jobs queued meanwhile included); returns the jobs it worked on.
+    """
+    finished = []
+    tried = set()
+    while True:
+        pending = [job for job in list_jobs() if job["status"] in UNFINISHED and job["id"] not in tried]
+        if not pending:
+            return finished
+        for job in pending:
+            tried.add(job["id"])
+            job = run_job(job["id"], workers)
+            if job is not None:
+                finished.append(job)
+
+def _run_queue():
+    global _runner, _wakeup
+    while True:
+        with _runner_lock:
+            if not _wakeup:
+                _runner = None
+                return
+            _wakeup = False
+        run_pending()
+
+def start_background_runner():
+    """
+    Work the queue on a daemon thread. If this process already has one, it
+    makes another pass before exiting, so a job queued while it runs is not
+    left behind.
+    """
+    global _runner, _wakeup
+    with _runner_lock:
+        _wakeup = True
+        if _runner is not None and _runner.is_alive():
+            return
+        _runner = threading.Thread(target=_run_queue, daemon=True)
+        _runner.start()
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk re-translation of patient records")
+    commands = parser.add_subparsers(dest="command", required=True)
+    enqueue_parser = commands.add_parser("enqueue")
+    enqueue_parser.add_argument("patient_name")
+    enqueue_parser.add_argument("target_language")
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--workers", type=int, default=TRANSLATION_JOB_WORKERS)
+    commands.add_parser("status")
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        job = enqueue(args.patient_name, args.target_language)
+        print(f"Job {job['id']}: {job['status']}")
+    elif args.command == "run":
+        for job in run_pending(args.workers):
+            print(f"Job {job['id']} ({job['patient_name']} -> {job['target_language']}): {job['status']}, "
+                  f"{len(job['done'])}/{job['total']} done, {len(job['failed'])} failed")
+    else:
+        for job in list_jobs():
+            print(f"Job {job['id']} ({job['patient_name']} -> {job['target_language']}): {job['status']}, "
+                  f"{len(job['done'])}/{job['total'] if job['total'] is not None else '?'} done, "
+                  f"{len(job['failed'])} failed")
+
+if __name__ == "__main__":
+    main()